@@ -22,12 +22,11 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Timewise Guardian from a config entry."""
-    coordinator = TWGCoordinator(hass)
+    coordinator = TWGCoordinator(hass, entry)
     await coordinator.async_config_entry_first_refresh()
     
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
-        "listeners": []
     }
 
     # Set up all platforms
@@ -74,9 +73,7 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok:
-        # Clean up
-        for unsub in hass.data[DOMAIN][entry.entry_id]["listeners"]:
-            unsub()
+        # Clean up; event listeners are released via entry.async_on_unload
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
@@ -5,6 +5,8 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers import selector
 
 from .const import (
     DOMAIN, CONF_USERS, CONF_BLOCKLIST_CATEGORIES, 
@@ -12,6 +14,10 @@ from .const import (
     EVENT_USER_DETECTED
 )
 
+_DOMAIN_LIST_SELECTOR = selector.TextSelector(
+    selector.TextSelectorConfig(multiple=True)
+)
+
 class TWGConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Timewise Guardian."""
 
@@ -41,6 +47,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         """Initialize options flow."""
         self.config_entry = config_entry
         self.options = dict(config_entry.options)
+        self._registry: Optional[er.EntityRegistry] = None
 
     async def async_step_init(self, user_input=None):
         """Manage the options."""
@@ -70,23 +77,33 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             return await coordinator.async_get_categories()
         return {}
 
+    @callback
+    def _get_registry(self) -> er.EntityRegistry:
+        """Return the entity registry, fetching it once per flow."""
+        if self._registry is None:
+            self._registry = er.async_get(self.hass)
+        return self._registry
+
     async def _get_active_users(self):
         """Get list of active computer users."""
-        # Get from entity registry
-        registry = self.hass.helpers.entity_registry.async_get(self.hass)
-        users = {
-            entity_id: entry.original_name
-            for entity_id, entry in registry.entities.items()
-            if entry.platform == "twg" and entry.domain == "sensor"
-        }
-        
-        # Get from coordinator for real-time users
+        # Start from the coordinator for real-time users
+        users = {}
         coordinator = self.hass.data[DOMAIN].get("coordinator")
         if coordinator:
-            active_users = await coordinator.async_get_active_users()
-            for user_id, user_info in active_users.items():
-                if user_id not in users:
-                    users[user_id] = user_info["friendly_name"]
+            users = {
+                user_id: user_info["friendly_name"]
+                for user_id, user_info in coordinator.get_active_users().items()
+            }
+
+        # Entity registry entries take precedence
+        registry = self._get_registry()
+        users.update({
+            entry.entity_id: entry.original_name
+            for entry in er.async_entries_for_config_entry(
+                registry, self.config_entry.entry_id
+            )
+            if entry.domain == "sensor"
+        })
         
         return users
 
@@ -94,13 +111,10 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         """Configure settings for selected user."""
         if user_input is not None:
             # Update options for this user
-            if CONF_USERS not in self.options:
-                self.options[CONF_USERS] = {}
-            
-            self.options[CONF_USERS][self._current_user] = {
+            self.options.setdefault(CONF_USERS, {})[self._current_user] = {
                 CONF_BLOCKLIST_CATEGORIES: user_input[CONF_BLOCKLIST_CATEGORIES],
-                CONF_WHITELIST: user_input.get(CONF_WHITELIST, "").split(),
-                CONF_BLACKLIST: user_input.get(CONF_BLACKLIST, "").split()
+                CONF_WHITELIST: user_input.get(CONF_WHITELIST, []),
+                CONF_BLACKLIST: user_input.get(CONF_BLACKLIST, [])
             }
 
             # Fire event to notify clients
@@ -123,12 +137,12 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 ): cv.multi_select(categories),
                 vol.Optional(
                     CONF_WHITELIST,
-                    default=" ".join(user_config.get(CONF_WHITELIST, []))
-                ): cv.string,
+                    default=user_config.get(CONF_WHITELIST, [])
+                ): _DOMAIN_LIST_SELECTOR,
                 vol.Optional(
                     CONF_BLACKLIST,
-                    default=" ".join(user_config.get(CONF_BLACKLIST, []))
-                ): cv.string
+                    default=user_config.get(CONF_BLACKLIST, [])
+                ): _DOMAIN_LIST_SELECTOR
             }),
             description_placeholders={
                 "name": self._users[self._current_user]
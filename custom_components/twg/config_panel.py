@@ -1,4 +1,5 @@
 """Config panel for Timewise Guardian."""
+import asyncio
 from typing import Any
 import voluptuous as vol
 
@@ -19,26 +20,28 @@ from homeassistant.exceptions import HomeAssistantError
 from .const import DOMAIN
 from .models import TWGStore, UserConfig, Category, TimeRestriction
 
+_RESTRICTION_SCHEMA = vol.Schema({
+    vol.Required("days"): [str],
+    vol.Required("start_time"): str,
+    vol.Required("end_time"): str,
+    vol.Required("category"): str,
+}, extra=vol.PREVENT_EXTRA)
+
+_CATEGORY_SCHEMA = vol.Schema({
+    vol.Required("name"): str,
+    vol.Required("processes"): [str],
+    vol.Required("window_titles"): [str],
+    vol.Required("urls"): [str],
+    vol.Required("time_limit"): int,
+    vol.Required("restrictions"): [_RESTRICTION_SCHEMA],
+}, extra=vol.PREVENT_EXTRA)
+
 CONFIG_SCHEMA = vol.Schema({
     vol.Required("name"): str,
-    vol.Required("categories"): {
-        str: vol.Schema({
-            vol.Required("name"): str,
-            vol.Required("processes"): [str],
-            vol.Required("window_titles"): [str],
-            vol.Required("urls"): [str],
-            vol.Required("time_limit"): int,
-            vol.Required("restrictions"): [vol.Schema({
-                vol.Required("days"): [str],
-                vol.Required("start_time"): str,
-                vol.Required("end_time"): str,
-                vol.Required("category"): str,
-            })],
-        }),
-    },
+    vol.Required("categories"): {str: _CATEGORY_SCHEMA},
     vol.Required("notifications_enabled"): bool,
     vol.Required("warning_threshold"): int,
-})
+}, extra=vol.PREVENT_EXTRA)
 
 class ConfigError(HomeAssistantError):
     """Config error."""
@@ -46,9 +49,10 @@ class ConfigError(HomeAssistantError):
 async def async_setup_panel(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
     """Set up the config panel."""
     store = TWGStore(hass, config_entry.entry_id)
-    await store.async_load()
+    # Load in the background; requests wait for it instead of setup
+    load_task = hass.async_create_task(store.async_load(), eager_start=True)
 
-    hass.http.register_view(TWGConfigView(store))
+    hass.http.register_view(TWGConfigView(store, load_task))
     
     async_register_command(hass, websocket_get_config)
     async_register_command(hass, websocket_update_config)
@@ -59,13 +63,15 @@ class TWGConfigView(HomeAssistantView):
     name = "api:twg:config"
     requires_auth = True
 
-    def __init__(self, store: TWGStore) -> None:
+    def __init__(self, store: TWGStore, load_task: asyncio.Task) -> None:
         """Initialize."""
         self._store = store
+        self._load_task = load_task
 
     async def get(self, request, user_id):
         """Handle GET request."""
         try:
+            await self._load_task
             config = self._store.get_user_config(user_id)
             if config:
                 return self.json(config.to_dict())
@@ -84,6 +90,7 @@ class TWGConfigView(HomeAssistantView):
             config = UserConfig.from_dict(data)
             
             # Save config
+            await self._load_task
             await self._store.async_update_user_config(user_id, config)
             return self.json({"success": True})
         except vol.Invalid as err:
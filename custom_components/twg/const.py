@@ -1,59 +1,71 @@
 """Constants for the Timewise Guardian integration."""
+from typing import Final
 
-DOMAIN = "twg"
-NAME = "Timewise Guardian"
-VERSION = "1.0.0"
+DOMAIN: Final = "twg"
+NAME: Final = "Timewise Guardian"
+VERSION: Final = "1.0.0"
 
 # Config flow
-CONF_HOST = "host"
-CONF_PORT = "port"
-CONF_API_KEY = "api_key"
-CONF_SCAN_INTERVAL = "scan_interval"
-CONF_USERS = "users"
-CONF_BLOCKLIST_CATEGORIES = "blocklist_categories"
-CONF_WHITELIST = "whitelist"
-CONF_BLACKLIST = "blacklist"
+CONF_HOST: Final = "host"
+CONF_PORT: Final = "port"
+CONF_API_KEY: Final = "api_key"
+CONF_SCAN_INTERVAL: Final = "scan_interval"
+CONF_USERS: Final = "users"
+CONF_BLOCKLIST_CATEGORIES: Final = "blocklist_categories"
+CONF_WHITELIST: Final = "whitelist"
+CONF_BLACKLIST: Final = "blacklist"
 
 # Defaults
-DEFAULT_HOST = "localhost"
-DEFAULT_PORT = 8123
-DEFAULT_SCAN_INTERVAL = 30
+DEFAULT_HOST: Final = "localhost"
+DEFAULT_PORT: Final = 8123
+DEFAULT_SCAN_INTERVAL: Final = 30
 
 # Services
-SERVICE_UPDATE = "update"
-SERVICE_REFRESH = "refresh"
-SERVICE_SET_LIMIT = "set_limit"
-SERVICE_ADD_CATEGORY = "add_category"
-SERVICE_REMOVE_CATEGORY = "remove_category"
+SERVICE_UPDATE: Final = "update"
+SERVICE_REFRESH: Final = "refresh"
+SERVICE_SET_LIMIT: Final = "set_limit"
+SERVICE_ADD_CATEGORY: Final = "add_category"
+SERVICE_REMOVE_CATEGORY: Final = "remove_category"
 
 # Event types
-EVENT_USER_ACTIVITY = "twg_user_activity"
-EVENT_USER_DETECTED = "twg_user_detected"
-EVENT_CATEGORIES_UPDATED = "twg_categories_updated"
-EVENT_TIME_LIMIT_WARNING = "twg_time_limit_warning"
-EVENT_TIME_LIMIT_REACHED = "twg_time_limit_reached"
-EVENT_RESTRICTION_ACTIVE = "twg_restriction_active"
+EVENT_USER_ACTIVITY: Final = "twg_user_activity"
+EVENT_USER_DETECTED: Final = "twg_user_detected"
+EVENT_CATEGORIES_UPDATED: Final = "twg_categories_updated"
+EVENT_TIME_LIMIT_WARNING: Final = "twg_time_limit_warning"
+EVENT_TIME_LIMIT_REACHED: Final = "twg_time_limit_reached"
+EVENT_RESTRICTION_ACTIVE: Final = "twg_restriction_active"
 
 # Entity categories
-ENTITY_CATEGORY_USER = "user"
-ENTITY_CATEGORY_COMPUTER = "computer"
-ENTITY_CATEGORY_SESSION = "session"
+ENTITY_CATEGORY_USER: Final = "user"
+ENTITY_CATEGORY_COMPUTER: Final = "computer"
+ENTITY_CATEGORY_SESSION: Final = "session"
 
 # State attributes
-ATTR_USER = "user"
-ATTR_COMPUTER = "computer"
-ATTR_CATEGORY = "category"
-ATTR_TIME_USED = "time_used"
-ATTR_TIME_LIMIT = "time_limit"
-ATTR_ACTIVE_WINDOW = "active_window"
-ATTR_PROCESS = "process"
-ATTR_START_TIME = "start_time"
-ATTR_END_TIME = "end_time"
-ATTR_DURATION = "duration"
-ATTR_STATUS = "status"
+ATTR_USER: Final = "user"
+ATTR_COMPUTER: Final = "computer"
+ATTR_CATEGORY: Final = "category"
+ATTR_TIME_USED: Final = "time_used"
+ATTR_TIME_LIMIT: Final = "time_limit"
+ATTR_ACTIVE_WINDOW: Final = "active_window"
+ATTR_PROCESS: Final = "process"
+ATTR_START_TIME: Final = "start_time"
+ATTR_END_TIME: Final = "end_time"
+ATTR_DURATION: Final = "duration"
+ATTR_STATUS: Final = "status"
+
+# User statistics sections, in response order; twg/stats/get can ask for a subset
+STATS_USER_FIELDS: Final = (
+    "dailyStats",
+    "weeklyStats",
+    "monthlyStats",
+    "peakHours",
+    "hourlyUsage",
+    "categoryComparison",
+    "trendAnalysis",
+)
 
 # Error messages
-ERROR_AUTH = "Invalid authentication"
-ERROR_CANNOT_CONNECT = "Cannot connect to service"
-ERROR_INVALID_HOST = "Invalid host"
-ERROR_UNKNOWN = "Unknown error occurred" 
\ No newline at end of file
+ERROR_AUTH: Final = "Invalid authentication"
+ERROR_CANNOT_CONNECT: Final = "Cannot connect to service"
+ERROR_INVALID_HOST: Final = "Invalid host"
+ERROR_UNKNOWN: Final = "Unknown error occurred" 
\ No newline at end of file
@@ -1,25 +1,73 @@
 """Data coordinator for Timewise Guardian."""
 import asyncio
 import logging
+from collections.abc import Iterator, Mapping
 from datetime import timedelta
+from operator import attrgetter
+from types import MappingProxyType
 from typing import Dict, Any, Optional, Set
+from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
 from homeassistant.helpers.entity_registry import async_get as get_entity_registry
+from homeassistant.helpers.start import async_at_started
 
 from .const import (
     DOMAIN, EVENT_USER_DETECTED, EVENT_USER_ACTIVITY,
     EVENT_CATEGORIES_UPDATED, EVENT_TIME_LIMIT_WARNING,
     EVENT_TIME_LIMIT_REACHED, EVENT_RESTRICTION_ACTIVE
 )
+from .models import UserRuntime
 
 _LOGGER = logging.getLogger(__name__)
 
+# Shared by every unknown user, so nothing in it may be mutable. Such users
+# are unavailable and their attributes are never serialized, so the nested
+# mappingproxies never reach Home Assistant's JSON encoder
+_EMPTY_MAPPING: Mapping[str, Any] = MappingProxyType({})
+_EMPTY_USER_CONFIG = MappingProxyType({
+    "info": _EMPTY_MAPPING,
+    "state": _EMPTY_MAPPING,
+    "blocked_domains": (),
+    "time_limits": _EMPTY_MAPPING,
+    "restrictions": _EMPTY_MAPPING,
+})
+
+class _RuntimeView(Mapping):
+    """Read-only view of one UserRuntime field keyed by user_id."""
+
+    __slots__ = ("_users", "_field")
+
+    def __init__(self, users: Dict[str, UserRuntime], field: str) -> None:
+        """Initialize the view."""
+        self._users = users
+        self._field = attrgetter(field)
+
+    def __getitem__(self, user_id: str) -> Any:
+        """Return the field value for a user."""
+        return self._field(self._users[user_id])
+
+    def __contains__(self, user_id: object) -> bool:
+        """Check membership without the KeyError round trip of Mapping."""
+        return user_id in self._users
+
+    def get(self, user_id: str, default: Any = None) -> Any:
+        """Return the field value for a user, or default."""
+        runtime = self._users.get(user_id)
+        return default if runtime is None else self._field(runtime)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over user ids."""
+        return iter(self._users)
+
+    def __len__(self) -> int:
+        """Return the number of users."""
+        return len(self._users)
+
 class TWGCoordinator(DataUpdateCoordinator):
     """Class to manage fetching TWG data."""
 
-    def __init__(self, hass: HomeAssistant) -> None:
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         """Initialize the coordinator."""
         super().__init__(
             hass,
@@ -28,31 +76,37 @@ class TWGCoordinator(DataUpdateCoordinator):
             update_interval=timedelta(seconds=30),
         )
         self.hass = hass
-        self._active_users: Dict[str, Dict[str, Any]] = {}
+        self._users: Dict[str, UserRuntime] = {}
         self._available_categories: Dict[str, str] = {}
-        self._user_states: Dict[str, Dict[str, Any]] = {}
-        self._blocked_domains: Dict[str, Set[str]] = {}
-        self._time_limits: Dict[str, Dict[str, Any]] = {}
-        self._restrictions: Dict[str, Dict[str, Any]] = {}
+        # Activity that arrived before user_detected, e.g. on a reconnect;
+        # becomes the user's state once they are detected
+        self._pending_states: Dict[str, Dict[str, Any]] = {}
+        self._data: Dict[str, Any] = {
+            "users": _RuntimeView(self._users, "info"),
+            "categories": self._available_categories,
+            "states": _RuntimeView(self._users, "state"),
+            "blocked": _RuntimeView(self._users, "blocked"),
+            "limits": _RuntimeView(self._users, "limits"),
+            "restrictions": _RuntimeView(self._users, "restrictions"),
+        }
         
-        # Register event handlers
-        hass.bus.async_listen(EVENT_USER_DETECTED, self._handle_user_detected)
-        hass.bus.async_listen(EVENT_USER_ACTIVITY, self._handle_user_activity)
-        hass.bus.async_listen(EVENT_CATEGORIES_UPDATED, self._handle_categories_updated)
+        # Register event handlers; unsubscribed when the entry unloads
+        entry.async_on_unload(
+            hass.bus.async_listen(EVENT_USER_DETECTED, self._handle_user_detected)
+        )
+        entry.async_on_unload(
+            hass.bus.async_listen(EVENT_USER_ACTIVITY, self._handle_user_activity)
+        )
+        entry.async_on_unload(
+            hass.bus.async_listen(EVENT_CATEGORIES_UPDATED, self._handle_categories_updated)
+        )
         
-        # Register startup handler
-        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, self._handle_startup)
+        # Register startup handler; runs immediately if HA is already running
+        entry.async_on_unload(async_at_started(hass, self._handle_startup))
 
     async def _async_update_data(self) -> Dict[str, Any]:
         """Fetch data from API endpoint."""
-        return {
-            "users": self._active_users,
-            "categories": self._available_categories,
-            "states": self._user_states,
-            "blocked": self._blocked_domains,
-            "limits": self._time_limits,
-            "restrictions": self._restrictions
-        }
+        return self._data
 
     @callback
     def _handle_user_detected(self, event) -> None:
@@ -61,18 +115,15 @@ class TWGCoordinator(DataUpdateCoordinator):
         user_info = event.data.get("user_info", {})
         
         if user_id and user_info:
-            self._active_users[user_id] = user_info
-            # Initialize user data structures
-            if user_id not in self._user_states:
-                self._user_states[user_id] = {"state": "active"}
-            if user_id not in self._blocked_domains:
-                self._blocked_domains[user_id] = set()
-            if user_id not in self._time_limits:
-                self._time_limits[user_id] = {}
-            if user_id not in self._restrictions:
-                self._restrictions[user_id] = {}
-            
-            self.async_set_updated_data(self._async_update_data())
+            runtime = self._users.get(user_id)
+            if runtime is None:
+                runtime = self._users[user_id] = UserRuntime(
+                    state=self._pending_states.pop(user_id, None) or {"state": "active"}
+                )
+            runtime.info = user_info
+            runtime.config_view = None
+            runtime.version += 1
+            self.async_set_updated_data(self._data)
 
     @callback
     def _handle_user_activity(self, event) -> None:
@@ -81,21 +132,31 @@ class TWGCoordinator(DataUpdateCoordinator):
         activity = event.data.get("activity", {})
         
         if user_id and activity:
-            if user_id not in self._user_states:
-                self._user_states[user_id] = {}
-            
-            self._user_states[user_id].update(activity)
-            self.async_set_updated_data(self._async_update_data())
+            runtime = self._users.get(user_id)
+            if runtime is None:
+                # No entities exist yet; keep it for when the user is detected
+                self._pending_states.setdefault(user_id, {}).update(activity)
+                return
+
+            # Clients resend the same window/process repeatedly; skip no-op updates
+            current = runtime.state
+            if all(current.get(key) == value for key, value in activity.items()):
+                return
+
+            current.update(activity)
+            runtime.version += 1
+            self.async_set_updated_data(self._data)
 
     @callback
     def _handle_categories_updated(self, event) -> None:
         """Handle categories update event."""
         categories = event.data.get("categories", {})
-        if categories:
+        if categories and categories != self._available_categories:
             self._available_categories = categories
-            self.async_set_updated_data(self._async_update_data())
+            self._data["categories"] = categories
+            self.async_set_updated_data(self._data)
 
-    async def _handle_startup(self, _) -> None:
+    async def _handle_startup(self, _hass: HomeAssistant) -> None:
         """Handle Home Assistant startup."""
         # Load existing entities
         registry = get_entity_registry(self.hass)
@@ -105,56 +166,99 @@ class TWGCoordinator(DataUpdateCoordinator):
         for entity_id, entry in entities.items():
             if entry.platform == DOMAIN:
                 user_id = entry.unique_id
-                if user_id not in self._active_users:
-                    self._active_users[user_id] = {
+                if user_id not in self._users:
+                    self._users[user_id] = UserRuntime(info={
                         "friendly_name": entry.original_name,
                         "entity_id": entity_id
-                    }
+                    })
         
         await self.async_refresh()
 
     async def async_update_user_state(self, user_id: str, state: Dict[str, Any]) -> None:
         """Update user state."""
-        if user_id in self._user_states:
-            self._user_states[user_id].update(state)
-            self.async_set_updated_data(self._async_update_data())
+        runtime = self._users.get(user_id)
+        if runtime is not None:
+            runtime.state.update(state)
+            runtime.version += 1
+            self.async_set_updated_data(self._data)
 
     async def async_update_blocked_domains(self, user_id: str, domains: Set[str]) -> None:
         """Update blocked domains for user."""
-        if user_id in self._blocked_domains:
-            self._blocked_domains[user_id] = domains
-            self.async_set_updated_data(self._async_update_data())
+        runtime = self._users.get(user_id)
+        if runtime is None:
+            return
+
+        current = runtime.blocked
+        added = domains - current
+        removed = current - domains
+        if not added and not removed:
+            return
+
+        current |= added
+        current -= removed
+        runtime.config_view = None
+        runtime.version += 1
+        self.async_set_updated_data(self._data)
 
     async def async_update_time_limits(self, user_id: str, limits: Dict[str, Any]) -> None:
         """Update time limits for user."""
-        if user_id in self._time_limits:
-            self._time_limits[user_id].update(limits)
-            self.async_set_updated_data(self._async_update_data())
+        runtime = self._users.get(user_id)
+        if runtime is not None:
+            runtime.limits.update(limits)
+            runtime.version += 1
+            self.async_set_updated_data(self._data)
 
     async def async_update_restrictions(self, user_id: str, restrictions: Dict[str, Any]) -> None:
         """Update restrictions for user."""
-        if user_id in self._restrictions:
-            self._restrictions[user_id].update(restrictions)
-            self.async_set_updated_data(self._async_update_data())
-
-    def get_user_config(self, user_id: str) -> Dict[str, Any]:
-        """Get complete configuration for a user."""
-        return {
-            "info": self._active_users.get(user_id, {}),
-            "state": self._user_states.get(user_id, {}),
-            "blocked_domains": list(self._blocked_domains.get(user_id, set())),
-            "time_limits": self._time_limits.get(user_id, {}),
-            "restrictions": self._restrictions.get(user_id, {})
-        }
+        runtime = self._users.get(user_id)
+        if runtime is not None:
+            runtime.restrictions.update(restrictions)
+            runtime.version += 1
+            self.async_set_updated_data(self._data)
+
+    def get_user_config(self, user_id: str) -> Mapping[str, Any]:
+        """Get complete configuration for a user.
+
+        Returns a read-only view that is reused until the user's info or
+        blocked domains change; copy it with dict() before modifying.
+        """
+        runtime = self._users.get(user_id)
+        if runtime is None:
+            return _EMPTY_USER_CONFIG
+        if runtime.config_view is None:
+            runtime.config_view = MappingProxyType({
+                "info": runtime.info,
+                "state": runtime.state,
+                "blocked_domains": list(runtime.blocked),
+                "time_limits": runtime.limits,
+                "restrictions": runtime.restrictions
+            })
+        return runtime.config_view
+
+    def get_user_version(self, user_id: str) -> int:
+        """Get a counter that changes whenever the user's config changes."""
+        runtime = self._users.get(user_id)
+        return 0 if runtime is None else runtime.version
 
     def is_user_active(self, user_id: str) -> bool:
         """Check if a user is currently active."""
-        return user_id in self._active_users
+        return user_id in self._users
 
-    def get_active_users(self) -> Dict[str, Dict[str, Any]]:
-        """Get all active users."""
-        return self._active_users
+    def get_active_users(self) -> Mapping[str, Dict[str, Any]]:
+        """Get all active users.
+
+        Returns a live read-only view; nothing is copied per call.
+        """
+        return self._data["users"]
+
+    def get_user_info(self, user_id: str) -> Dict[str, Any]:
+        """Get the info dict for a single active user."""
+        return self._users[user_id].info
 
     def get_available_categories(self) -> Dict[str, str]:
-        """Get available blocklist categories."""
-        return self._available_categories 
\ No newline at end of file
+        """Get available blocklist categories.
+
+        The same mapping is returned until the categories change, so
+        entities can hold the reference and compare it by identity.
+        """
+        return self._available_categories
\ No newline at end of file
@@ -1,19 +1,67 @@
 """Database management for Timewise Guardian."""
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional
+from functools import partial
+from itertools import combinations, islice
+from typing import (
+    Any, AsyncIterator, Callable, Deque, Dict, Iterator, List, Optional, Tuple, TypeVar,
+)
 import logging
 from pathlib import Path
+import queue
 import sqlite3
-import json
+import threading
+import time
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.json import json_dumps
 
 _LOGGER = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+# Stored in PRAGMA user_version once the schema and defaults are in place
 SCHEMA_VERSION = 1
 DB_FILENAME = "twg.db"
 
+# check_permission result cache; the TTL bounds how long an expired grant
+# can keep answering True
+PERMISSION_CACHE_SIZE = 1024
+PERMISSION_CACHE_TTL = 60
+
+# get_roles/get_user_permissions result cache, dropped on every write that
+# touches roles or grants; the TTL only covers writes from other processes
+READ_CACHE_SIZE = 256
+READ_CACHE_TTL = 30
+
+# Standalone audit entries are buffered and written in batches
+AUDIT_FLUSH_SIZE = 32
+AUDIT_FLUSH_INTERVAL = 1.0
+
+# Rows per chunk when streaming the audit log to a client
+AUDIT_STREAM_CHUNK = 200
+
+# Read-only connections kept open alongside the single writer
+READER_POOL_SIZE = 4
+# Seconds to wait for a free reader before giving up; audit streams hold
+# one across awaits, so slow clients can drain the pool
+READER_TIMEOUT = 10
+
+# WAL with synchronous=NORMAL is crash-safe (a power loss can only drop the
+# most recent commits, never corrupt the file) and avoids an fsync per commit
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA foreign_keys=ON",
+)
+
 # Default roles and permissions
 DEFAULT_ROLES = {
     "admin": {
@@ -66,34 +114,212 @@ DEFAULT_PERMISSIONS = {
     "view_own_restrictions": "View own time restrictions",
 }
 
+# Flattened (role, permission) pairs used to seed role_permissions
+DEFAULT_ROLE_PERMISSIONS = [
+    (role_name, permission_name)
+    for role_name, role_data in DEFAULT_ROLES.items()
+    for permission_name in role_data["permissions"]
+]
+
+SEED_ROLE_PERMISSIONS_SQL = """
+    INSERT OR IGNORE INTO role_permissions (role_id, permission_id)
+    SELECT r.id, p.id
+    FROM roles r, permissions p
+    WHERE r.name = ? AND p.name = ?
+"""
+
+# Hot-path statements; constant text keeps them in sqlite3's statement cache
+CHECK_PERMISSION_SQL = """
+    SELECT EXISTS (
+        SELECT 1
+        FROM user_permissions up
+        JOIN permissions p ON p.id = up.permission_id
+        WHERE up.user_id = ? AND p.name = ?
+            AND (up.expires_at IS NULL OR up.expires_at > CURRENT_TIMESTAMP)
+        UNION ALL
+        SELECT 1
+        FROM user_roles ur
+        JOIN role_permissions rp ON rp.role_id = ur.role_id
+        JOIN permissions p ON p.id = rp.permission_id
+        WHERE ur.user_id = ? AND p.name = ?
+    )
+"""
+
+# CHECK_PERMISSION_SQL for many (user_id, permission) pairs at once, bound
+# as one JSON array of pairs; yields the pair's array index and the result
+CHECK_PERMISSIONS_SQL = """
+    WITH checks (idx, user_id, name) AS (
+        SELECT key, json_extract(value, '$[0]'), json_extract(value, '$[1]')
+        FROM json_each(?)
+    )
+    SELECT c.idx, EXISTS (
+        SELECT 1
+        FROM user_permissions up
+        JOIN permissions p ON p.id = up.permission_id
+        WHERE up.user_id = c.user_id AND p.name = c.name
+            AND (up.expires_at IS NULL OR up.expires_at > CURRENT_TIMESTAMP)
+        UNION ALL
+        SELECT 1
+        FROM user_roles ur
+        JOIN role_permissions rp ON rp.role_id = ur.role_id
+        JOIN permissions p ON p.id = rp.permission_id
+        WHERE ur.user_id = c.user_id AND p.name = c.name
+    )
+    FROM checks c
+"""
+
+# Permission names are bound as one JSON array so the text never changes
+MISSING_PERMISSIONS_SQL = """
+    SELECT DISTINCT value FROM json_each(?)
+    WHERE value NOT IN (SELECT name FROM permissions)
+"""
+
+ADD_ROLE_PERMISSIONS_SQL = """
+    INSERT INTO role_permissions (role_id, permission_id)
+    SELECT ?, p.id FROM permissions p
+    WHERE p.name IN (SELECT value FROM json_each(?))
+"""
+
+LOG_AUDIT_SQL = """
+    INSERT INTO audit_log
+    (user_id, action, target_type, target_id, details)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# One statement per combination of audit filters, built once at import;
+# parameters are bound in AUDIT_FILTERS order followed by the limit.
+# before_id is a paging cursor: ids grow with timestamps, so the entries
+# older than the last one a client has seen are exactly those with a lower id
+AUDIT_FILTERS = {
+    "user_id": "user_id = ?",
+    "action": "action = ?",
+    "target_type": "target_type = ?",
+    "target_id": "target_id = ?",
+    "before_id": "id < ?",
+}
+
+_AUDIT_QUERIES: Dict[frozenset, str] = {
+    frozenset(combo): " ".join(filter(None, (
+        "SELECT * FROM audit_log",
+        "WHERE " + " AND ".join(AUDIT_FILTERS[name] for name in combo) if combo else "",
+        "ORDER BY timestamp DESC, id DESC LIMIT ?",
+    )))
+    for count in range(len(AUDIT_FILTERS) + 1)
+    for combo in combinations(AUDIT_FILTERS, count)
+}
+
+def _adapt_datetime(value: datetime) -> str:
+    """Store datetimes in the same format as CURRENT_TIMESTAMP."""
+    return value.isoformat(" ")
+
+# Explicit replacement for the sqlite3 default adapter deprecated in Python
+# 3.12. Reads stay text: TIMESTAMP columns are returned as stored, so a
+# legacy or malformed value cannot fail a whole query
+sqlite3.register_adapter(datetime, _adapt_datetime)
+
 class PermissionDenied(HomeAssistantError):
     """Permission denied error."""
 
+class DatabaseBusy(HomeAssistantError):
+    """No pooled reader became free in time."""
+
 class Database:
-    """Database management class."""
+    """Database management class.
+
+    Writes go through a single connection in explicit transactions, while
+    reads are served from a small pool of query-only connections so that
+    WAL readers never wait on the writer.
+    """
 
     def __init__(self, hass: Optional[HomeAssistant] = None) -> None:
         """Initialize database."""
         self.hass = hass
-        self._conn = None
-        self._cursor = None
-        self._setup_database()
-        self._initialize_defaults()
-
-    def _setup_database(self) -> None:
-        """Set up database and create tables if they don't exist."""
-        db_path = Path(self.hass.config.path(DB_FILENAME)) if self.hass else Path(DB_FILENAME)
-        
-        self._conn = sqlite3.connect(db_path)
-        self._conn.row_factory = sqlite3.Row
-        self._cursor = self._conn.cursor()
+        self._db_path = Path(hass.config.path(DB_FILENAME)) if hass else Path(DB_FILENAME)
+        self._writer: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._perm_cache: OrderedDict[Tuple[str, str], Tuple[bool, float]] = OrderedDict()
+        self._perm_cache_lock = threading.Lock()
+        # Bumped on invalidation so a check racing a revoke is not cached
+        self._perm_generation = 0
+        self._read_cache: OrderedDict[Tuple, Tuple[Any, float]] = OrderedDict()
+        # Bumped on invalidation so a read racing a write is not cached
+        self._read_generation = 0
+        self._audit_buf: Deque[Tuple] = deque()
+        self._audit_lock = threading.Lock()
+        self._audit_last_flush = time.monotonic()
+        if self._setup_database():
+            self._initialize_defaults()
+
+    @classmethod
+    async def async_create(cls, hass: HomeAssistant) -> "Database":
+        """Open the database in the executor so setup I/O stays off the event loop."""
+        return await hass.async_add_executor_job(cls, hass)
+
+    def _connect(self, isolation_level: Optional[str] = "") -> sqlite3.Connection:
+        """Open a connection with the shared pragmas applied."""
+        conn = sqlite3.connect(
+            self._db_path,
+            cached_statements=256,
+            check_same_thread=False,
+            isolation_level=isolation_level,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Cursor]:
+        """Run statements in a write transaction on the writer connection."""
+        with self._write_lock:
+            cursor = self._writer.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                if self._writer.in_transaction:
+                    cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Cursor]:
+        """Borrow a read-only connection from the pool."""
+        try:
+            conn = self._readers.get(timeout=READER_TIMEOUT)
+        except queue.Empty:
+            raise DatabaseBusy(
+                f"No database reader free after {READER_TIMEOUT}s"
+            ) from None
+        try:
+            yield conn.cursor()
+        finally:
+            self._readers.put(conn)
 
-        # Create tables
-        self._cursor.executescript("""
-            CREATE TABLE IF NOT EXISTS schema_version (
-                version INTEGER PRIMARY KEY
-            );
+    def _setup_database(self) -> bool:
+        """Set up database and create tables if they don't exist.
+
+        Returns True when the schema was (re)created and defaults still need
+        seeding, False when the database is already at SCHEMA_VERSION.
+        """
+        # Autocommit mode; transactions are opened explicitly in _write
+        self._writer = self._connect(isolation_level=None)
+        cursor = self._writer.cursor()
+
+        journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        if journal_mode.lower() != "wal":
+            _LOGGER.warning("SQLite WAL mode unavailable, using %s journal", journal_mode)
+
+        for _ in range(READER_POOL_SIZE):
+            reader = self._connect()
+            reader.execute("PRAGMA query_only=1")
+            self._readers.put(reader)
 
+        if cursor.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+            return False
+
+        # Create tables
+        cursor.executescript("""
             CREATE TABLE IF NOT EXISTS roles (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT NOT NULL UNIQUE,
@@ -147,78 +373,86 @@ class Database:
                 target_id TEXT,
                 details TEXT
             );
-        """)
 
-        # Check schema version
-        self._cursor.execute("SELECT version FROM schema_version LIMIT 1")
-        result = self._cursor.fetchone()
-        if not result:
-            self._cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (SCHEMA_VERSION,))
-            self._conn.commit()
+            CREATE INDEX IF NOT EXISTS idx_audit_timestamp
+                ON audit_log(timestamp DESC);
+            CREATE INDEX IF NOT EXISTS idx_audit_user_time
+                ON audit_log(user_id, timestamp DESC);
+            CREATE INDEX IF NOT EXISTS idx_audit_target
+                ON audit_log(target_type, target_id, timestamp DESC);
+            CREATE INDEX IF NOT EXISTS idx_user_permissions_perm
+                ON user_permissions(permission_id);
+            CREATE INDEX IF NOT EXISTS idx_role_permissions_perm
+                ON role_permissions(permission_id);
+        """)
+        return True
 
     def _initialize_defaults(self) -> None:
         """Initialize default roles and permissions."""
         try:
-            # Initialize permissions
-            for name, description in DEFAULT_PERMISSIONS.items():
-                self._cursor.execute("""
+            # Seed everything in a single transaction
+            with self._write() as cursor:
+                cursor.executemany("""
                     INSERT OR IGNORE INTO permissions (name, description)
                     VALUES (?, ?)
-                """, (name, description))
+                """, DEFAULT_PERMISSIONS.items())
 
-            # Initialize roles
-            for role_name, role_data in DEFAULT_ROLES.items():
-                self._cursor.execute("""
+                cursor.executemany("""
                     INSERT OR IGNORE INTO roles (name, description)
                     VALUES (?, ?)
-                """, (role_name, role_data["description"]))
-
-                # Get role ID
-                self._cursor.execute("SELECT id FROM roles WHERE name = ?", (role_name,))
-                role = self._cursor.fetchone()
-                if not role:
-                    continue
-
-                # Add permissions to role
-                for permission_name in role_data["permissions"]:
-                    self._cursor.execute("""
-                        INSERT OR IGNORE INTO role_permissions (role_id, permission_id)
-                        SELECT ?, id FROM permissions WHERE name = ?
-                    """, (role["id"], permission_name))
-
-            self._conn.commit()
+                """, [(name, data["description"]) for name, data in DEFAULT_ROLES.items()])
+
+                cursor.executemany(SEED_ROLE_PERMISSIONS_SQL, DEFAULT_ROLE_PERMISSIONS)
+
+                # Give the query planner statistics for the seeded tables
+                cursor.execute("ANALYZE")
+
+                # Only mark the schema current once seeding has committed
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
         except sqlite3.Error as err:
             _LOGGER.error("Failed to initialize defaults: %s", err)
 
     def close(self) -> None:
-        """Close database connection."""
-        if self._conn:
-            self._conn.close()
+        """Close database connections."""
+        if self._writer:
+            self.flush_audit()
+            # Let sqlite refresh any statistics that have gone stale
+            self._writer.execute("PRAGMA optimize")
+            self._writer.close()
+            self._writer = None
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
 
     def get_roles(self) -> List[Dict]:
         """Get all roles."""
-        self._cursor.execute("""
-            SELECT r.*, GROUP_CONCAT(p.name) as permissions
-            FROM roles r
-            LEFT JOIN role_permissions rp ON r.id = rp.role_id
-            LEFT JOIN permissions p ON rp.permission_id = p.id
-            GROUP BY r.id
-        """)
-        return [dict(row) for row in self._cursor.fetchall()]
+        return self._cached_read(("roles",), self._load_roles)
+
+    def _load_roles(self) -> List[Dict]:
+        """Read all roles with their permissions."""
+        with self._read() as cursor:
+            cursor.execute("SELECT * FROM roles")
+            roles = list(self._iter_dicts(cursor))
+            cursor.execute("""
+                SELECT rp.role_id, p.name
+                FROM role_permissions rp
+                JOIN permissions p ON p.id = rp.permission_id
+            """)
+            return self._attach_role_permissions(roles, cursor.fetchall())
 
     def create_role(self, name: str, description: str, permissions: List[str] = None) -> int:
         """Create a new role."""
         try:
-            self._cursor.execute(
-                "INSERT INTO roles (name, description) VALUES (?, ?)",
-                (name, description)
-            )
-            role_id = self._cursor.lastrowid
+            with self._write() as cursor:
+                cursor.execute(
+                    "INSERT INTO roles (name, description) VALUES (?, ?)",
+                    (name, description)
+                )
+                role_id = cursor.lastrowid
 
-            if permissions:
-                self._add_permissions_to_role(role_id, permissions)
+                if permissions:
+                    self._add_permissions_to_role(cursor, role_id, permissions)
 
-            self._conn.commit()
+            self._invalidate_reads(("roles",))
             return role_id
         except sqlite3.IntegrityError as err:
             raise PermissionDenied(f"Role name already exists: {err}")
@@ -235,128 +469,172 @@ class Database:
             updates.append("description = ?")
             params.append(description)
         
-        if updates:
-            params.append(role_id)
-            self._cursor.execute(
-                f"UPDATE roles SET {', '.join(updates)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-                params
-            )
+        with self._write() as cursor:
+            if updates:
+                params.append(role_id)
+                cursor.execute(
+                    f"UPDATE roles SET {', '.join(updates)}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                    params
+                )
 
-        if permissions is not None:
-            self._cursor.execute("DELETE FROM role_permissions WHERE role_id = ?", (role_id,))
-            self._add_permissions_to_role(role_id, permissions)
+            if permissions is not None:
+                cursor.execute("DELETE FROM role_permissions WHERE role_id = ?", (role_id,))
+                self._add_permissions_to_role(cursor, role_id, permissions)
 
-        self._conn.commit()
+        self._invalidate_permissions()
 
     def delete_role(self, role_id: int) -> None:
         """Delete a role."""
-        self._cursor.execute("DELETE FROM roles WHERE id = ?", (role_id,))
-        self._conn.commit()
+        with self._write() as cursor:
+            cursor.execute("DELETE FROM roles WHERE id = ?", (role_id,))
+        self._invalidate_permissions()
 
     def get_user_roles(self, user_id: str) -> List[Dict]:
         """Get roles assigned to a user."""
-        self._cursor.execute("""
-            SELECT r.*, ur.granted_by, ur.granted_at,
-                   GROUP_CONCAT(p.name) as permissions
-            FROM roles r
-            JOIN user_roles ur ON r.id = ur.role_id
-            LEFT JOIN role_permissions rp ON r.id = rp.role_id
-            LEFT JOIN permissions p ON rp.permission_id = p.id
-            WHERE ur.user_id = ?
-            GROUP BY r.id
-        """, (user_id,))
-        return [dict(row) for row in self._cursor.fetchall()]
+        with self._read() as cursor:
+            cursor.execute("""
+                SELECT r.*, ur.granted_by, ur.granted_at
+                FROM user_roles ur
+                JOIN roles r ON r.id = ur.role_id
+                WHERE ur.user_id = ?
+            """, (user_id,))
+            roles = list(self._iter_dicts(cursor))
+            cursor.execute("""
+                SELECT rp.role_id, p.name
+                FROM user_roles ur
+                JOIN role_permissions rp ON rp.role_id = ur.role_id
+                JOIN permissions p ON p.id = rp.permission_id
+                WHERE ur.user_id = ?
+            """, (user_id,))
+            return self._attach_role_permissions(roles, cursor.fetchall())
+
+    @staticmethod
+    def _exists(cursor: sqlite3.Cursor, table: str, name: str) -> bool:
+        """Return whether a role or permission with this name exists."""
+        cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {table} WHERE name = ?)", (name,))
+        return bool(cursor.fetchone()[0])
+
+    @staticmethod
+    def _iter_dicts(cursor: sqlite3.Cursor) -> Iterator[Dict]:
+        """Yield the cursor's remaining rows as dicts, one row at a time."""
+        columns = [column[0] for column in cursor.description]
+        for row in cursor:
+            yield dict(zip(columns, row))
+
+    @staticmethod
+    def _attach_role_permissions(roles: List[Dict], pairs: List[Tuple[int, str]]) -> List[Dict]:
+        """Set each role's permissions list from (role_id, name) rows."""
+        by_id = {}
+        for role in roles:
+            role["permissions"] = by_id[role["id"]] = []
+        for role_id, name in pairs:
+            # Skip roles created between the two reads
+            if role_id in by_id:
+                by_id[role_id].append(name)
+        return roles
 
     def assign_role(self, user_id: str, role_name: str, granted_by: str) -> None:
         """Assign a role to a user."""
         try:
-            self._cursor.execute("SELECT id FROM roles WHERE name = ?", (role_name,))
-            role = self._cursor.fetchone()
-            if not role:
-                raise PermissionDenied(f"Role not found: {role_name}")
-
-            self._cursor.execute("""
-                INSERT OR REPLACE INTO user_roles (user_id, role_id, granted_by)
-                VALUES (?, ?, ?)
-            """, (user_id, role["id"], granted_by))
-            self._conn.commit()
-
-            self.log_audit(
-                user_id=granted_by,
-                action="assign_role",
-                target_type="user",
-                target_id=user_id,
-                details={"role": role_name}
-            )
+            with self._write() as cursor:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO user_roles (user_id, role_id, granted_by)
+                    SELECT ?, id, ? FROM roles WHERE name = ?
+                """, (user_id, granted_by, role_name))
+                if not cursor.rowcount:
+                    raise PermissionDenied(f"Role not found: {role_name}")
+
+                self._log_audit(
+                    cursor,
+                    user_id=granted_by,
+                    action="assign_role",
+                    target_type="user",
+                    target_id=user_id,
+                    details={"role": role_name}
+                )
+            self._invalidate_permissions(user_id)
         except sqlite3.Error as err:
             raise PermissionDenied(f"Failed to assign role: {err}")
 
     def remove_role(self, user_id: str, role_name: str, removed_by: str) -> None:
         """Remove a role from a user."""
         try:
-            self._cursor.execute("SELECT id FROM roles WHERE name = ?", (role_name,))
-            role = self._cursor.fetchone()
-            if not role:
-                raise PermissionDenied(f"Role not found: {role_name}")
-
-            self._cursor.execute("""
-                DELETE FROM user_roles
-                WHERE user_id = ? AND role_id = ?
-            """, (user_id, role["id"]))
-            self._conn.commit()
-
-            self.log_audit(
-                user_id=removed_by,
-                action="remove_role",
-                target_type="user",
-                target_id=user_id,
-                details={"role": role_name}
-            )
+            with self._write() as cursor:
+                cursor.execute("""
+                    DELETE FROM user_roles
+                    WHERE user_id = ? AND role_id = (SELECT id FROM roles WHERE name = ?)
+                """, (user_id, role_name))
+                # Nothing deleted: only look the role up to tell the cases apart
+                if not cursor.rowcount and not self._exists(cursor, "roles", role_name):
+                    raise PermissionDenied(f"Role not found: {role_name}")
+
+                self._log_audit(
+                    cursor,
+                    user_id=removed_by,
+                    action="remove_role",
+                    target_type="user",
+                    target_id=user_id,
+                    details={"role": role_name}
+                )
+            self._invalidate_permissions(user_id)
         except sqlite3.Error as err:
             raise PermissionDenied(f"Failed to remove role: {err}")
 
     def get_user_permissions(self, user_id: str) -> List[Dict]:
         """Get permissions for a user."""
-        self._cursor.execute("""
-            SELECT DISTINCT p.name, p.description,
-                   up.granted_by, up.granted_at, up.expires_at, up.reason,
-                   r.name as granted_by_role
-            FROM permissions p
-            LEFT JOIN user_permissions up ON p.id = up.permission_id AND up.user_id = ?
-            LEFT JOIN user_roles ur ON ur.user_id = ?
-            LEFT JOIN role_permissions rp ON rp.permission_id = p.id AND rp.role_id = ur.role_id
-            LEFT JOIN roles r ON r.id = ur.role_id
-            WHERE up.user_id IS NOT NULL OR ur.user_id IS NOT NULL
-        """, (user_id, user_id))
-        return [dict(row) for row in self._cursor.fetchall()]
+        return self._cached_read(
+            ("user_permissions", str(user_id)), partial(self._load_user_permissions, user_id)
+        )
+
+    def _load_user_permissions(self, user_id: str) -> List[Dict]:
+        """Read a user's direct and role-inherited permissions."""
+        with self._read() as cursor:
+            # Direct grants, then grants inherited through roles
+            cursor.execute("""
+                SELECT p.name, p.description,
+                       up.granted_by, up.granted_at, up.expires_at, up.reason,
+                       NULL as granted_by_role
+                FROM user_permissions up
+                JOIN permissions p ON p.id = up.permission_id
+                WHERE up.user_id = ?
+                UNION ALL
+                SELECT p.name, p.description,
+                       ur.granted_by, ur.granted_at, NULL, NULL,
+                       r.name
+                FROM user_roles ur
+                JOIN roles r ON r.id = ur.role_id
+                JOIN role_permissions rp ON rp.role_id = ur.role_id
+                JOIN permissions p ON p.id = rp.permission_id
+                WHERE ur.user_id = ?
+            """, (user_id, user_id))
+            return list(self._iter_dicts(cursor))
 
     def grant_permission(self, user_id: str, permission_name: str, granted_by: str,
                         expires_at: Optional[datetime] = None, reason: Optional[str] = None) -> None:
         """Grant a permission to a user."""
         try:
-            self._cursor.execute("SELECT id FROM permissions WHERE name = ?", (permission_name,))
-            permission = self._cursor.fetchone()
-            if not permission:
-                raise PermissionDenied(f"Permission not found: {permission_name}")
-
-            self._cursor.execute("""
-                INSERT OR REPLACE INTO user_permissions
-                (user_id, permission_id, granted_by, expires_at, reason)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_id, permission["id"], granted_by, expires_at, reason))
-            self._conn.commit()
-
-            self.log_audit(
-                user_id=granted_by,
-                action="grant_permission",
-                target_type="user",
-                target_id=user_id,
-                details={
-                    "permission": permission_name,
-                    "expires_at": expires_at.isoformat() if expires_at else None,
-                    "reason": reason
-                }
-            )
+            with self._write() as cursor:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO user_permissions
+                    (user_id, permission_id, granted_by, expires_at, reason)
+                    SELECT ?, id, ?, ?, ? FROM permissions WHERE name = ?
+                """, (user_id, granted_by, expires_at, reason, permission_name))
+                if not cursor.rowcount:
+                    raise PermissionDenied(f"Permission not found: {permission_name}")
+
+                self._log_audit(
+                    cursor,
+                    user_id=granted_by,
+                    action="grant_permission",
+                    target_type="user",
+                    target_id=user_id,
+                    details={
+                        "permission": permission_name,
+                        "expires_at": expires_at,
+                        "reason": reason
+                    }
+                )
+            self._invalidate_permissions(user_id)
         except sqlite3.Error as err:
             raise PermissionDenied(f"Failed to grant permission: {err}")
 
@@ -364,106 +642,330 @@ class Database:
                          reason: Optional[str] = None) -> None:
         """Revoke a permission from a user."""
         try:
-            self._cursor.execute("SELECT id FROM permissions WHERE name = ?", (permission_name,))
-            permission = self._cursor.fetchone()
-            if not permission:
-                raise PermissionDenied(f"Permission not found: {permission_name}")
-
-            self._cursor.execute("""
-                DELETE FROM user_permissions
-                WHERE user_id = ? AND permission_id = ?
-            """, (user_id, permission["id"]))
-            self._conn.commit()
-
-            self.log_audit(
-                user_id=revoked_by,
-                action="revoke_permission",
-                target_type="user",
-                target_id=user_id,
-                details={
-                    "permission": permission_name,
-                    "reason": reason
-                }
-            )
+            with self._write() as cursor:
+                cursor.execute("""
+                    DELETE FROM user_permissions
+                    WHERE user_id = ?
+                        AND permission_id = (SELECT id FROM permissions WHERE name = ?)
+                """, (user_id, permission_name))
+                if not cursor.rowcount and not self._exists(cursor, "permissions", permission_name):
+                    raise PermissionDenied(f"Permission not found: {permission_name}")
+
+                self._log_audit(
+                    cursor,
+                    user_id=revoked_by,
+                    action="revoke_permission",
+                    target_type="user",
+                    target_id=user_id,
+                    details={
+                        "permission": permission_name,
+                        "reason": reason
+                    }
+                )
+            self._invalidate_permissions(user_id)
         except sqlite3.Error as err:
             raise PermissionDenied(f"Failed to revoke permission: {err}")
 
     def check_permission(self, user_id: str, permission_name: str) -> bool:
         """Check if a user has a specific permission."""
-        self._cursor.execute("""
-            SELECT 1
-            FROM permissions p
-            LEFT JOIN user_permissions up ON p.id = up.permission_id AND up.user_id = ?
-            LEFT JOIN user_roles ur ON ur.user_id = ?
-            LEFT JOIN role_permissions rp ON rp.permission_id = p.id AND rp.role_id = ur.role_id
-            WHERE p.name = ?
-                AND (up.user_id IS NOT NULL OR ur.user_id IS NOT NULL)
-                AND (up.expires_at IS NULL OR up.expires_at > CURRENT_TIMESTAMP)
-            LIMIT 1
-        """, (user_id, user_id, permission_name))
-        return bool(self._cursor.fetchone())
+        key = (str(user_id), permission_name)
+        now = time.monotonic()
+        with self._perm_cache_lock:
+            cached = self._perm_cache.get(key)
+            if cached is not None and cached[1] > now:
+                self._perm_cache.move_to_end(key)
+                return cached[0]
+            generation = self._perm_generation
+
+        with self._read() as cursor:
+            cursor.execute(
+                CHECK_PERMISSION_SQL,
+                (user_id, permission_name, user_id, permission_name)
+            )
+            allowed = bool(cursor.fetchone()[0])
+
+        with self._perm_cache_lock:
+            if generation == self._perm_generation:
+                self._perm_cache[key] = (allowed, now + PERMISSION_CACHE_TTL)
+                self._perm_cache.move_to_end(key)
+                if len(self._perm_cache) > PERMISSION_CACHE_SIZE:
+                    self._perm_cache.popitem(last=False)
+        return allowed
+
+    def check_permissions(self, checks: List[Tuple[str, str]]) -> List[bool]:
+        """Check many (user_id, permission_name) pairs in one query.
+
+        Results are returned in the order of checks and share the
+        check_permission cache.
+        """
+        keys = [(str(user_id), permission_name) for user_id, permission_name in checks]
+        results: List[Optional[bool]] = [None] * len(keys)
+        misses = []
+        now = time.monotonic()
+        with self._perm_cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._perm_cache.get(key)
+                if cached is not None and cached[1] > now:
+                    self._perm_cache.move_to_end(key)
+                    results[i] = cached[0]
+                else:
+                    misses.append(i)
+            generation = self._perm_generation
+
+        if misses:
+            with self._read() as cursor:
+                cursor.execute(
+                    CHECK_PERMISSIONS_SQL, (json_dumps([keys[i] for i in misses]),)
+                )
+                rows = cursor.fetchall()
+
+            with self._perm_cache_lock:
+                store = generation == self._perm_generation
+                for idx, allowed in rows:
+                    i = misses[idx]
+                    results[i] = bool(allowed)
+                    if store:
+                        self._perm_cache[keys[i]] = (results[i], now + PERMISSION_CACHE_TTL)
+                        self._perm_cache.move_to_end(keys[i])
+                while len(self._perm_cache) > PERMISSION_CACHE_SIZE:
+                    self._perm_cache.popitem(last=False)
+        return results
+
+    def _invalidate_permissions(self, user_id: Optional[str] = None) -> None:
+        """Drop cached permission checks for a user, or all users."""
+        # Cache keys hold the user_id as text; callers pass str or int ids
+        if user_id is not None:
+            user_id = str(user_id)
+        with self._perm_cache_lock:
+            self._perm_generation += 1
+            if user_id is None:
+                self._perm_cache.clear()
+            else:
+                for key in [key for key in self._perm_cache if key[0] == user_id]:
+                    del self._perm_cache[key]
+        self._invalidate_reads(None if user_id is None else ("user_permissions", user_id))
+
+    def _cached_read(self, key: Tuple, load: Callable[[], _T]) -> _T:
+        """Return a cached read result, loading and caching it on a miss."""
+        now = time.monotonic()
+        with self._perm_cache_lock:
+            cached = self._read_cache.get(key)
+            if cached is not None and cached[1] > now:
+                self._read_cache.move_to_end(key)
+                return cached[0]
+            generation = self._read_generation
+
+        result = load()
+
+        with self._perm_cache_lock:
+            if generation == self._read_generation:
+                self._read_cache[key] = (result, now + READ_CACHE_TTL)
+                self._read_cache.move_to_end(key)
+                if len(self._read_cache) > READ_CACHE_SIZE:
+                    self._read_cache.popitem(last=False)
+        return result
+
+    def _invalidate_reads(self, key: Optional[Tuple] = None) -> None:
+        """Drop one cached read result, or all of them."""
+        with self._perm_cache_lock:
+            self._read_generation += 1
+            if key is None:
+                self._read_cache.clear()
+            else:
+                self._read_cache.pop(key, None)
 
     def log_audit(self, user_id: str, action: str, target_type: str,
                  target_id: str, details: Optional[Dict] = None) -> None:
-        """Log an audit entry."""
+        """Log an audit entry.
+
+        Entries are buffered and written in batches, at the latest
+        AUDIT_FLUSH_INTERVAL after the first one, so a crash can lose
+        entries that have not been flushed yet.
+        """
+        row = (user_id, action, target_type, target_id,
+               json_dumps(details) if details else None)
+        with self._audit_lock:
+            self._audit_buf.append(row)
+            if (len(self._audit_buf) < AUDIT_FLUSH_SIZE
+                    and time.monotonic() - self._audit_last_flush < AUDIT_FLUSH_INTERVAL):
+                # Nothing may call log_audit again, so a timer flushes the batch
+                if len(self._audit_buf) == 1 and self.hass is not None:
+                    self.hass.loop.call_soon_threadsafe(self._async_schedule_audit_flush)
+                return
+        self.flush_audit()
+
+    @callback
+    def _async_schedule_audit_flush(self) -> None:
+        """Flush the audit buffer once AUDIT_FLUSH_INTERVAL has passed."""
+        async_call_later(self.hass, AUDIT_FLUSH_INTERVAL, self._async_flush_audit)
+
+    async def _async_flush_audit(self, _now: datetime) -> None:
+        """Flush the audit buffer in the executor."""
+        await self._async_run(self.flush_audit)
+
+    def flush_audit(self) -> None:
+        """Write buffered audit entries in a single transaction."""
+        with self._audit_lock:
+            rows = list(self._audit_buf)
+            self._audit_buf.clear()
+            self._audit_last_flush = time.monotonic()
+        # A timer can still fire after close(), which already flushed
+        if not rows or self._writer is None:
+            return
         try:
-            self._cursor.execute("""
-                INSERT INTO audit_log
-                (user_id, action, target_type, target_id, details)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_id, action, target_type, target_id,
-                 json.dumps(details) if details else None))
-            self._conn.commit()
+            with self._write() as cursor:
+                cursor.executemany(LOG_AUDIT_SQL, rows)
         except sqlite3.Error as err:
-            _LOGGER.error("Failed to log audit entry: %s", err)
+            _LOGGER.error("Failed to write %d audit entries: %s", len(rows), err)
+
+    def _log_audit(self, cursor: sqlite3.Cursor, user_id: str, action: str,
+                   target_type: str, target_id: str, details: Optional[Dict] = None) -> None:
+        """Write an audit entry inside the caller's transaction."""
+        cursor.execute(LOG_AUDIT_SQL, (
+            user_id, action, target_type, target_id,
+            json_dumps(details) if details else None
+        ))
 
     def get_audit_log(self, user_id: Optional[str] = None,
                      action: Optional[str] = None,
                      target_type: Optional[str] = None,
                      target_id: Optional[str] = None,
-                     limit: int = 100) -> List[Dict]:
-        """Get audit log entries."""
-        query = ["SELECT * FROM audit_log"]
-        params = []
-        conditions = []
-
-        if user_id:
-            conditions.append("user_id = ?")
-            params.append(user_id)
-        if action:
-            conditions.append("action = ?")
-            params.append(action)
-        if target_type:
-            conditions.append("target_type = ?")
-            params.append(target_type)
-        if target_id:
-            conditions.append("target_id = ?")
-            params.append(target_id)
-
-        if conditions:
-            query.append("WHERE " + " AND ".join(conditions))
-
-        query.append("ORDER BY timestamp DESC LIMIT ?")
-        params.append(limit)
-
-        self._cursor.execute(" ".join(query), params)
-        return [dict(row) for row in self._cursor.fetchall()]
-
-    def _add_permissions_to_role(self, role_id: int, permission_names: List[str]) -> None:
+                     limit: int = 100,
+                     before_id: Optional[int] = None) -> List[Dict]:
+        """Get audit log entries, newest first, older than before_id if given."""
+        return list(self.iter_audit_log(user_id, action, target_type, target_id, limit, before_id))
+
+    def iter_audit_log(self, user_id: Optional[str] = None,
+                      action: Optional[str] = None,
+                      target_type: Optional[str] = None,
+                      target_id: Optional[str] = None,
+                      limit: int = 100,
+                      before_id: Optional[int] = None) -> Iterator[Dict]:
+        """Stream audit log entries.
+
+        A pooled reader is held until the iterator is exhausted or closed.
+        """
+        self.flush_audit()
+        filters = {
+            name: value
+            for name, value in zip(
+                AUDIT_FILTERS, (user_id, action, target_type, target_id, before_id)
+            )
+            if value
+        }
+
+        with self._read() as cursor:
+            cursor.execute(_AUDIT_QUERIES[frozenset(filters)], (*filters.values(), limit))
+            yield from self._iter_dicts(cursor)
+
+    def _add_permissions_to_role(self, cursor: sqlite3.Cursor, role_id: int,
+                                 permission_names: List[str]) -> None:
         """Add permissions to a role."""
-        placeholders = ",".join("?" * len(permission_names))
-        self._cursor.execute(
-            f"SELECT id, name FROM permissions WHERE name IN ({placeholders})",
-            permission_names
+        names = json_dumps(permission_names)
+        cursor.execute(MISSING_PERMISSIONS_SQL, (names,))
+        missing = {row[0] for row in cursor.fetchall()}
+        if missing:
+            raise PermissionDenied(f"Permissions not found: {missing}")
+
+        cursor.execute(ADD_ROLE_PERMISSIONS_SQL, (role_id, names))
+
+    async def _async_run(self, func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+        """Run a database call in the executor to keep the event loop free."""
+        return await self.hass.async_add_executor_job(partial(func, *args, **kwargs))
+
+    async def async_get_roles(self) -> List[Dict]:
+        """Get all roles."""
+        return await self._async_run(self.get_roles)
+
+    async def async_create_role(self, name: str, description: str,
+                                permissions: List[str] = None) -> int:
+        """Create a new role."""
+        return await self._async_run(self.create_role, name, description, permissions)
+
+    async def async_update_role(self, role_id: int, name: str = None, description: str = None,
+                                permissions: List[str] = None) -> None:
+        """Update a role."""
+        await self._async_run(self.update_role, role_id, name, description, permissions)
+
+    async def async_delete_role(self, role_id: int) -> None:
+        """Delete a role."""
+        await self._async_run(self.delete_role, role_id)
+
+    async def async_get_user_roles(self, user_id: str) -> List[Dict]:
+        """Get roles assigned to a user."""
+        return await self._async_run(self.get_user_roles, user_id)
+
+    async def async_assign_role(self, user_id: str, role_name: str, granted_by: str) -> None:
+        """Assign a role to a user."""
+        await self._async_run(self.assign_role, user_id, role_name, granted_by)
+
+    async def async_remove_role(self, user_id: str, role_name: str, removed_by: str) -> None:
+        """Remove a role from a user."""
+        await self._async_run(self.remove_role, user_id, role_name, removed_by)
+
+    async def async_get_user_permissions(self, user_id: str) -> List[Dict]:
+        """Get permissions for a user."""
+        return await self._async_run(self.get_user_permissions, user_id)
+
+    async def async_grant_permission(self, user_id: str, permission_name: str, granted_by: str,
+                                     expires_at: Optional[datetime] = None,
+                                     reason: Optional[str] = None) -> None:
+        """Grant a permission to a user."""
+        await self._async_run(
+            self.grant_permission, user_id, permission_name, granted_by, expires_at, reason
         )
-        permissions = self._cursor.fetchall()
 
-        if len(permissions) != len(permission_names):
-            found = {p["name"] for p in permissions}
-            missing = set(permission_names) - found
-            raise PermissionDenied(f"Permissions not found: {missing}")
+    async def async_revoke_permission(self, user_id: str, permission_name: str, revoked_by: str,
+                                      reason: Optional[str] = None) -> None:
+        """Revoke a permission from a user."""
+        await self._async_run(self.revoke_permission, user_id, permission_name, revoked_by, reason)
+
+    async def async_check_permission(self, user_id: str, permission_name: str) -> bool:
+        """Check if a user has a specific permission."""
+        return await self._async_run(self.check_permission, user_id, permission_name)
 
-        self._cursor.executemany(
-            "INSERT INTO role_permissions (role_id, permission_id) VALUES (?, ?)",
-            [(role_id, p["id"]) for p in permissions]
-        ) 
\ No newline at end of file
+    async def async_check_permissions(self, checks: List[Tuple[str, str]]) -> List[bool]:
+        """Check many (user_id, permission_name) pairs in one query."""
+        return await self._async_run(self.check_permissions, checks)
+
+    async def async_log_audit(self, user_id: str, action: str, target_type: str,
+                              target_id: str, details: Optional[Dict] = None) -> None:
+        """Log an audit entry."""
+        await self._async_run(self.log_audit, user_id, action, target_type, target_id, details)
+
+    async def async_get_audit_log(self, user_id: Optional[str] = None,
+                                  action: Optional[str] = None,
+                                  target_type: Optional[str] = None,
+                                  target_id: Optional[str] = None,
+                                  limit: int = 100,
+                                  before_id: Optional[int] = None) -> List[Dict]:
+        """Get audit log entries."""
+        return await self._async_run(
+            self.get_audit_log, user_id, action, target_type, target_id, limit, before_id
+        )
+
+    async def async_iter_audit_log(self, user_id: Optional[str] = None,
+                                   action: Optional[str] = None,
+                                   target_type: Optional[str] = None,
+                                   target_id: Optional[str] = None,
+                                   limit: int = 100,
+                                   before_id: Optional[int] = None) -> AsyncIterator[List[Dict]]:
+        """Stream audit log entries in chunks, each read in the executor."""
+        rows = self.iter_audit_log(user_id, action, target_type, target_id, limit, before_id)
+        pending: Optional[asyncio.Future] = None
+        try:
+            while True:
+                pending = self.hass.async_add_executor_job(
+                    list, islice(rows, AUDIT_STREAM_CHUNK)
+                )
+                # Shielded so a cancelled consumer leaves the read to finish
+                chunk = await asyncio.shield(pending)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            if pending is not None and not pending.done():
+                await asyncio.wait([pending])
+            # Closing hands the pooled reader back; it must not run while the
+            # generator is still executing a chunk, so close on the executor
+            await self._async_run(rows.close)
@@ -1,10 +1,10 @@
 """Models for Timewise Guardian."""
-from dataclasses import dataclass, asdict
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Set
 from datetime import datetime
 from homeassistant.helpers.storage import Store
 
-@dataclass
+@dataclass(slots=True)
 class TimeRestriction:
     """Time restriction model."""
     days: List[str]
@@ -22,7 +22,16 @@ class TimeRestriction:
             category=data["category"]
         )
 
-@dataclass
+    def to_dict(self) -> dict:
+        """Convert to dictionary."""
+        return {
+            "days": self.days,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "category": self.category
+        }
+
+@dataclass(slots=True)
 class Category:
     """Category model."""
     name: str
@@ -44,7 +53,18 @@ class Category:
             restrictions=[TimeRestriction.from_dict(r) for r in data["restrictions"]]
         )
 
-@dataclass
+    def to_dict(self) -> dict:
+        """Convert to dictionary."""
+        return {
+            "name": self.name,
+            "processes": self.processes,
+            "window_titles": self.window_titles,
+            "urls": self.urls,
+            "time_limit": self.time_limit,
+            "restrictions": [r.to_dict() for r in self.restrictions]
+        }
+
+@dataclass(slots=True)
 class UserConfig:
     """User configuration model."""
     name: str
@@ -70,20 +90,35 @@ class UserConfig:
         return {
             "name": self.name,
             "categories": {
-                name: asdict(category)
+                name: category.to_dict()
                 for name, category in self.categories.items()
             },
             "notifications_enabled": self.notifications_enabled,
             "warning_threshold": self.warning_threshold
         }
 
-@dataclass
+@dataclass(slots=True)
 class ActiveUser:
     """Active user model."""
     name: str
     computer_id: str
     session_start: datetime
 
+@dataclass(slots=True)
+class UserRuntime:
+    """Runtime state tracked by the coordinator for a detected user."""
+    info: Dict[str, Any] = field(default_factory=dict)
+    state: Dict[str, Any] = field(default_factory=dict)
+    blocked: Set[str] = field(default_factory=set)
+    limits: Dict[str, Any] = field(default_factory=dict)
+    restrictions: Dict[str, Any] = field(default_factory=dict)
+    # Bumped on every change; the live config view compares equal to itself
+    version: int = field(default=0, init=False, compare=False)
+    # Cached get_user_config view; reset whenever info or blocked changes
+    config_view: Optional[Mapping[str, Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
 class TWGStore:
     """Class to manage Timewise Guardian storage."""
     def __init__(self, hass, config_entry_id: str) -> None:
@@ -2,7 +2,9 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Optional
+import sys
+from types import MappingProxyType
+from typing import Any, Mapping
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
@@ -15,9 +17,14 @@ from homeassistant.helpers.update_coordinator import (
 )
 
 from .const import DOMAIN, NAME, VERSION
+from .util import intern_value
 
 _LOGGER = logging.getLogger(__name__)
 
+# Shared read-only defaults for users missing from coordinator data
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+_NO_DOMAINS: frozenset[str] = frozenset()
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -28,121 +35,165 @@ async def async_setup_entry(
 
     # Create entities for existing users
     entities = []
-    for user_id, user_info in coordinator.get_active_users().items():
-        entities.extend([
-            TWGUserSensor(coordinator, user_id),
-            TWGActivitySensor(coordinator, user_id),
-            TWGTimeLimitSensor(coordinator, user_id),
-            TWGBlockedDomainsSensor(coordinator, user_id)
-        ])
+    for user_id in coordinator.get_active_users():
+        entities.extend(_create_user_sensors(coordinator, user_id))
+
+    async_add_entities(entities, update_before_add=False)
 
-    async_add_entities(entities)
+    # Users that already have entities
+    known_user_ids = set(coordinator.get_active_users())
 
     # Set up dynamic entity creation
     @callback
-    def async_add_new_user(user_id: str) -> None:
-        """Add entities for a new user."""
-        new_entities = [
-            TWGUserSensor(coordinator, user_id),
-            TWGActivitySensor(coordinator, user_id),
-            TWGTimeLimitSensor(coordinator, user_id),
-            TWGBlockedDomainsSensor(coordinator, user_id)
-        ]
-        async_add_entities(new_entities)
+    def async_check_new_users() -> None:
+        """Check for new users and add their entities in one batch."""
+        new_user_ids = coordinator.get_active_users().keys() - known_user_ids
+        if not new_user_ids:
+            return
+        known_user_ids.update(new_user_ids)
+        new_entities = []
+        for user_id in new_user_ids:
+            new_entities.extend(_create_user_sensors(coordinator, user_id))
+        async_add_entities(new_entities, update_before_add=False)
 
     # Register listener for new users
-    coordinator.async_add_listener(
-        lambda: hass.async_create_task(
-            async_check_new_users(coordinator, async_add_new_user)
-        )
+    config_entry.async_on_unload(coordinator.async_add_listener(async_check_new_users))
+
+def _user_device_info(user_id: str, friendly_name: str) -> DeviceInfo:
+    """Build the device info shared by a user's sensors."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, user_id)},
+        name=f"TWG {friendly_name}",
+        manufacturer="Timewise Guardian",
+        model=VERSION,
+        sw_version=VERSION,
     )
 
-async def async_check_new_users(
+def _create_user_sensors(
     coordinator: DataUpdateCoordinator,
-    add_callback: callable
-) -> None:
-    """Check for new users and add entities."""
-    for user_id in coordinator.get_active_users():
-        if not coordinator.hass.states.get(f"sensor.twg_{user_id}_status"):
-            add_callback(user_id)
+    user_id: str,
+) -> list[TWGBaseSensor]:
+    """Create all sensors for a user with a single DeviceInfo."""
+    # One shared user_id object for all four sensors' ids and lookups
+    user_id = sys.intern(user_id)
+    friendly_name = coordinator.get_user_info(user_id)["friendly_name"]
+    device_info = _user_device_info(user_id, friendly_name)
+    return [
+        TWGUserSensor(coordinator, user_id, device_info),
+        TWGActivitySensor(coordinator, user_id, device_info),
+        TWGTimeLimitSensor(coordinator, user_id, device_info),
+        TWGBlockedDomainsSensor(coordinator, user_id, device_info),
+    ]
 
 class TWGBaseSensor(CoordinatorEntity, SensorEntity):
     """Base class for TWG sensors."""
 
+    # No need to poll. Coordinator notifies entity of updates.
+    _attr_should_poll = False
+
+    _key: str
+    _name_suffix: str
+
     def __init__(
         self,
         coordinator: DataUpdateCoordinator,
         user_id: str,
+        device_info: DeviceInfo | None = None,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
         self.user_id = user_id
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, user_id)},
-            name=f"TWG {coordinator.get_active_users()[user_id]['friendly_name']}",
-            manufacturer="Timewise Guardian",
-            model=VERSION,
-            sw_version=VERSION,
-        )
+        self._attr_unique_id = f"twg_{user_id}_{self._key}"
+        friendly_name = coordinator.get_user_info(user_id)["friendly_name"]
+        self._set_friendly_name(friendly_name)
+        self._attr_device_info = device_info or _user_device_info(user_id, friendly_name)
+        self._last_written: tuple | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Take the initial snapshot when the entity is added."""
+        await super().async_added_to_hass()
+        self._update_availability()
+        self._update_from_coordinator()
 
-    @property
-    def should_poll(self) -> bool:
-        """No need to poll. Coordinator notifies entity of updates."""
-        return False
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Snapshot the coordinator data and write state only if it changed."""
+        info = self.coordinator.get_active_users().get(self.user_id)
+        if info and info.get("friendly_name", self._friendly_name) != self._friendly_name:
+            self._set_friendly_name(info["friendly_name"])
+        self._update_availability()
+        self._update_from_coordinator()
+        written = (
+            self._attr_available,
+            self._attr_name,
+            self._attr_native_value,
+            self._attributes_snapshot(),
+        )
+        if written == self._last_written:
+            return
+        self._last_written = written
+        super()._handle_coordinator_update()
+
+    def _set_friendly_name(self, friendly_name: str) -> None:
+        """Rebuild the entity name; only called when the friendly name changes."""
+        self._friendly_name = friendly_name
+        self._attr_name = f"TWG {friendly_name} {self._name_suffix}"
+
+    def _update_from_coordinator(self) -> None:
+        """Copy this sensor's value and attributes from coordinator data.
+
+        Subclasses override this; the base keeps its defaults so a missing
+        override can never raise inside the coordinator callback.
+        """
+
+    def _attributes_snapshot(self) -> Any:
+        """Return a value that changes whenever the attributes do."""
+        return self._attr_extra_state_attributes
+
+    def _update_availability(self) -> None:
+        """Cache availability as of the latest coordinator data."""
+        self._attr_available = (
+            self.coordinator.last_update_success
+            and self.coordinator.is_user_active(self.user_id)
+        )
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
-        return self.coordinator.last_update_success and self.coordinator.is_user_active(self.user_id)
+        # CoordinatorEntity overrides this, so point it back at the cache
+        return self._attr_available
 
 class TWGUserSensor(TWGBaseSensor):
     """Sensor for user status."""
 
-    @property
-    def unique_id(self) -> str:
-        """Return a unique ID."""
-        return f"twg_{self.user_id}_status"
+    _key = "status"
+    _name_suffix = "Status"
 
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return f"TWG {self.coordinator.get_active_users()[self.user_id]['friendly_name']} Status"
+    def _update_from_coordinator(self) -> None:
+        """Update the user status from coordinator data."""
+        state = self.coordinator.data["states"].get(self.user_id, _EMPTY)
+        self._attr_native_value = intern_value(state.get("state", "unknown"))
+        self._attr_extra_state_attributes = self.coordinator.get_user_config(self.user_id)
 
-    @property
-    def native_value(self) -> str:
-        """Return the state of the sensor."""
-        return self.coordinator.data["states"].get(self.user_id, {}).get("state", "unknown")
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        return self.coordinator.get_user_config(self.user_id)
+    def _attributes_snapshot(self) -> Any:
+        """Return the config version; the live config view always equals itself."""
+        return self.coordinator.get_user_version(self.user_id)
 
 class TWGActivitySensor(TWGBaseSensor):
     """Sensor for user activity."""
 
-    @property
-    def unique_id(self) -> str:
-        """Return a unique ID."""
-        return f"twg_{self.user_id}_activity"
-
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return f"TWG {self.coordinator.get_active_users()[self.user_id]['friendly_name']} Activity"
-
-    @property
-    def native_value(self) -> str:
-        """Return the state of the sensor."""
-        state = self.coordinator.data["states"].get(self.user_id, {})
-        return state.get("active_window", "unknown")
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        state = self.coordinator.data["states"].get(self.user_id, {})
-        return {
-            "process": state.get("process"),
+    _key = "activity"
+    _name_suffix = "Activity"
+    # Change with every activity update; the process stays recorded so
+    # history shows which program was running
+    _unrecorded_attributes = frozenset({"start_time", "duration"})
+
+    def _update_from_coordinator(self) -> None:
+        """Update the current activity from coordinator data."""
+        state = self.coordinator.data["states"].get(self.user_id, _EMPTY)
+        self._attr_native_value = state.get("active_window", "unknown")
+        self._attr_extra_state_attributes = {
+            "process": intern_value(state.get("process")),
             "start_time": state.get("start_time"),
             "duration": state.get("duration")
         }
@@ -150,27 +201,14 @@ class TWGActivitySensor(TWGBaseSensor):
 class TWGTimeLimitSensor(TWGBaseSensor):
     """Sensor for time limits."""
 
-    @property
-    def unique_id(self) -> str:
-        """Return a unique ID."""
-        return f"twg_{self.user_id}_time_limit"
+    _key = "time_limit"
+    _name_suffix = "Time Limit"
 
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return f"TWG {self.coordinator.get_active_users()[self.user_id]['friendly_name']} Time Limit"
-
-    @property
-    def native_value(self) -> Optional[int]:
-        """Return the state of the sensor."""
-        limits = self.coordinator.data["limits"].get(self.user_id, {})
-        return limits.get("daily_limit")
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        limits = self.coordinator.data["limits"].get(self.user_id, {})
-        return {
+    def _update_from_coordinator(self) -> None:
+        """Update the time limits from coordinator data."""
+        limits = self.coordinator.data["limits"].get(self.user_id, _EMPTY)
+        self._attr_native_value = limits.get("daily_limit")
+        self._attr_extra_state_attributes = {
             "time_used": limits.get("time_used", 0),
             "time_remaining": limits.get("time_remaining", 0),
             "reset_time": limits.get("reset_time")
@@ -179,26 +217,16 @@ class TWGTimeLimitSensor(TWGBaseSensor):
 class TWGBlockedDomainsSensor(TWGBaseSensor):
     """Sensor for blocked domains."""
 
-    @property
-    def unique_id(self) -> str:
-        """Return a unique ID."""
-        return f"twg_{self.user_id}_blocked"
-
-    @property
-    def name(self) -> str:
-        """Return the name of the sensor."""
-        return f"TWG {self.coordinator.get_active_users()[self.user_id]['friendly_name']} Blocked"
-
-    @property
-    def native_value(self) -> int:
-        """Return the state of the sensor."""
-        blocked = self.coordinator.data["blocked"].get(self.user_id, set())
-        return len(blocked)
-
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        return {
-            "blocked_domains": list(self.coordinator.data["blocked"].get(self.user_id, set())),
+    _key = "blocked"
+    _name_suffix = "Blocked"
+    # The domain list can be long; keep it out of the recorder
+    _unrecorded_attributes = frozenset({"blocked_domains", "categories"})
+
+    def _update_from_coordinator(self) -> None:
+        """Update the blocked domains from coordinator data."""
+        blocked = self.coordinator.data["blocked"].get(self.user_id, _NO_DOMAINS)
+        self._attr_native_value = len(blocked)
+        self._attr_extra_state_attributes = {
+            "blocked_domains": list(blocked),
             "categories": self.coordinator.get_available_categories()
         } 
\ No newline at end of file
@@ -1,7 +1,11 @@
 """Statistics handler for Timewise Guardian."""
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from collections import defaultdict
+import asyncio
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+import time
+from operator import attrgetter
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+from collections import defaultdict, deque
 
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.components.websocket_api import (
@@ -11,8 +15,33 @@ from homeassistant.components.websocket_api import (
 from homeassistant.components.recorder import history
 import voluptuous as vol
 
-from .const import DOMAIN
+from .const import DOMAIN, STATS_USER_FIELDS
 from .models import TWGStore
+from .util import intern_value
+
+# Sort key of recorder histories, which come back ordered by last_updated
+_LAST_UPDATED = attrgetter("last_updated")
+
+# Dividing timedeltas converts to minutes or hours in a single exact step
+_ONE_MINUTE = timedelta(minutes=1)
+_ONE_HOUR = timedelta(hours=1)
+
+# Recorder history moves on the minute scale while dashboards re-poll every
+# few seconds, so stats responses are reused for a short while
+STATS_CACHE_TTL = 30
+_stats_cache: Dict[tuple, Tuple[float, dict]] = {}
+
+# Recorder queries currently running, shared by callers asking for the same rows
+_inflight: Dict[tuple, asyncio.Task] = {}
+
+class HistoryIndex(NamedTuple):
+    """Per-state values shared by the activity calculations."""
+
+    durations: List[float]
+    hours: List[int]
+    dates: List[date]
+    categories: List[str]
+    processes: List[str]
 
 # Main websocket command handler
 @callback
@@ -21,19 +50,32 @@ from .models import TWGStore
     vol.Required("user_id"): str,
     vol.Optional("computer_id"): str,
     vol.Optional("session_id"): str,
+    vol.Optional("fields"): [vol.In(STATS_USER_FIELDS)],
 })
 async def websocket_get_stats(hass: HomeAssistant, connection: ActiveConnection, msg: dict) -> None:
     """Handle get stats command."""
     try:
         store = hass.data[DOMAIN][msg["entry_id"]]
-        
+        fields = frozenset(msg["fields"]) if msg.get("fields") else None
+        key = (msg["entry_id"], msg["user_id"], msg.get("computer_id"), msg.get("session_id"), fields)
+        now = time.monotonic()
+        cached = _stats_cache.get(key)
+        if cached is not None and now - cached[0] < STATS_CACHE_TTL:
+            connection.send_result(msg["id"], cached[1])
+            return
+
         if "session_id" in msg:
             stats = await get_session_stats(hass, store, msg["session_id"])
         elif "computer_id" in msg:
             stats = await get_computer_stats(hass, store, msg["computer_id"])
         else:
-            stats = await get_user_stats(hass, store, msg["user_id"])
-        
+            stats = await get_user_stats(hass, store, msg["user_id"], fields)
+
+        # Drop expired entries so the cache stays bounded by active requests
+        for stale in [k for k, (stored, _) in _stats_cache.items() if now - stored >= STATS_CACHE_TTL]:
+            del _stats_cache[stale]
+        _stats_cache[key] = (now, stats)
+
         connection.send_result(msg["id"], stats)
     except KeyError as err:
         connection.send_error(msg["id"], "invalid_entry", f"Entry not found: {err}")
@@ -41,35 +83,54 @@ async def websocket_get_stats(hass: HomeAssistant, connection: ActiveConnection,
         connection.send_error(msg["id"], "stats_error", str(err))
 
 # Main statistics functions
-async def get_user_stats(hass: HomeAssistant, store: TWGStore, user_id: str) -> dict:
-    """Get statistics for a user."""
+async def get_user_stats(
+    hass: HomeAssistant,
+    store: TWGStore,
+    user_id: str,
+    fields: Optional[frozenset] = None
+) -> dict:
+    """Get statistics for a user, limited to the given fields if any."""
     now = datetime.now()
     today = now.replace(hour=0, minute=0, second=0, microsecond=0)
     week_start = today - timedelta(days=today.weekday())
     month_start = today.replace(day=1)
 
     # Get user's activity history from recorder
-    activity_history = await get_activity_history(hass, store, user_id, month_start)
+    activity_history = await get_activity_history(hass, store, user_id, month_start, now)
 
-    # Calculate statistics for different time periods
-    daily_stats = calculate_period_stats(activity_history, today, now)
-    weekly_stats = calculate_period_stats(activity_history, week_start, now)
-    monthly_stats = calculate_period_stats(activity_history, month_start, now)
+    # The aggregation is pure CPU work, keep it off the event loop
+    return await hass.async_add_executor_job(
+        _compute_user_stats, activity_history, now, today, week_start, month_start, fields
+    )
 
-    # Calculate additional analytics
-    peak_hours = calculate_peak_hours(activity_history)
-    hourly_usage = calculate_hourly_usage(activity_history)
-    category_comparison = calculate_category_comparison(activity_history)
-    trend_analysis = calculate_trend_analysis(activity_history, week_start)
+def _compute_user_stats(
+    activity_history: List[dict],
+    now: datetime,
+    today: datetime,
+    week_start: datetime,
+    month_start: datetime,
+    fields: Optional[frozenset] = None,
+) -> dict:
+    """Aggregate a user's activity history into statistics."""
+    index = index_history(activity_history)
+
+    calculations = {
+        # Statistics for different time periods
+        "dailyStats": lambda: calculate_period_stats(activity_history, today, now, index),
+        "weeklyStats": lambda: calculate_period_stats(activity_history, week_start, now, index),
+        "monthlyStats": lambda: calculate_period_stats(activity_history, month_start, now, index),
+        # Additional analytics
+        "peakHours": lambda: calculate_peak_hours(activity_history, index),
+        "hourlyUsage": lambda: calculate_hourly_usage(activity_history, index),
+        "categoryComparison": lambda: calculate_category_comparison(activity_history, index),
+        "trendAnalysis": lambda: calculate_trend_analysis(activity_history, week_start, index),
+    }
 
+    # Only compute the sections the client asked for
     return {
-        "dailyStats": daily_stats,
-        "weeklyStats": weekly_stats,
-        "monthlyStats": monthly_stats,
-        "peakHours": peak_hours,
-        "hourlyUsage": hourly_usage,
-        "categoryComparison": category_comparison,
-        "trendAnalysis": trend_analysis,
+        field: calculate()
+        for field, calculate in calculations.items()
+        if fields is None or field in fields
     }
 
 async def get_computer_stats(hass: HomeAssistant, store: TWGStore, computer_id: str) -> dict:
@@ -81,6 +142,13 @@ async def get_computer_stats(hass: HomeAssistant, store: TWGStore, computer_id:
     # Get computer's activity history
     activity_history = await get_activity_history(hass, store, computer_id, week_start)
 
+    # The aggregation is pure CPU work, keep it off the event loop
+    return await hass.async_add_executor_job(
+        _compute_computer_stats, activity_history, computer_id
+    )
+
+def _compute_computer_stats(activity_history: List[dict], computer_id: str) -> dict:
+    """Aggregate a computer's activity history into statistics."""
     # Calculate system metrics
     uptime = calculate_uptime(activity_history)
     network_stats = calculate_network_stats(activity_history)
@@ -116,7 +184,7 @@ async def get_session_stats(hass: HomeAssistant, store: TWGStore, session_id: st
             "endTime": session[-1].last_updated.isoformat() if len(session) > 1 else None,
             "duration": calculate_session_duration(session),
         },
-        "activities": calculate_session_activities(session),
+        "activities": calculate_session_activities(session, precompute_durations(session)),
         "resourceUsage": calculate_session_resources(session),
         "networkUsage": calculate_session_network(session),
     }
@@ -126,7 +194,8 @@ async def get_activity_history(
     hass: HomeAssistant,
     store: TWGStore,
     identifier: str,
-    start_time: datetime
+    start_time: datetime,
+    end_time: Optional[datetime] = None
 ) -> List[dict]:
     """Get activity history from the recorder."""
     config = store.get_user_config(identifier)
@@ -137,12 +206,20 @@ async def get_activity_history(
         # If identifier is a computer_id
         entity_id = f"sensor.twg_computer_{identifier}_activity"
 
-    states = await history.get_state_changes(
+    # Callers pass end_time=now, so key on the cache window it falls in;
+    # otherwise concurrent requests would never share a query
+    window = None if end_time is None else int(end_time.timestamp()) // STATS_CACHE_TTL
+    states = await _shared_query(
         hass,
-        start_time,
-        entity_id=entity_id,
-        no_attributes=False,
-        include_start_time_state=True
+        (entity_id, start_time, window),
+        lambda: history.get_state_changes(
+            hass,
+            start_time,
+            end_time,
+            entity_id=entity_id,
+            no_attributes=False,
+            include_start_time_state=True
+        ),
     )
     
     return states.get(entity_id, [])
@@ -154,35 +231,55 @@ async def get_session_history(
 ) -> List[dict]:
     """Get history for a specific session."""
     entity_id = f"sensor.twg_session_{session_id}"
-    states = await history.get_state_changes(
+    states = await _shared_query(
         hass,
-        None,
-        entity_id=entity_id,
-        no_attributes=False,
-        include_start_time_state=True
+        (entity_id, None, None),
+        lambda: history.get_state_changes(
+            hass,
+            None,
+            entity_id=entity_id,
+            no_attributes=False,
+            include_start_time_state=True
+        ),
     )
     return states.get(entity_id, [])
 
+async def _shared_query(
+    hass: HomeAssistant,
+    key: tuple,
+    query: Callable[[], Awaitable[dict]]
+) -> dict:
+    """Run a recorder query, joining an identical one already in flight."""
+    task = _inflight.get(key)
+    if task is None:
+        task = _inflight[key] = hass.async_create_task(query())
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one caller going away does not cancel the query for the rest
+    return await asyncio.shield(task)
+
 def calculate_uptime(history: List[dict]) -> dict:
     """Calculate computer uptime statistics."""
-    total_uptime = 0
-    current_uptime = 0
+    # Summed as timedeltas and converted to hours once at the end
+    total_uptime = timedelta()
+    current_uptime = timedelta()
     last_boot = None
+    # Compare by position; State.__eq__ compares every field
+    last_index = len(history) - 1
 
-    for state in history:
+    for i, state in enumerate(history):
         if state.attributes.get("state") == "on":
             if not last_boot:
                 last_boot = state.last_updated
         elif last_boot:
-            duration = (state.last_updated - last_boot).total_seconds() / 3600  # hours
+            duration = state.last_updated - last_boot
             total_uptime += duration
-            if state == history[-1]:
+            if i == last_index:
                 current_uptime = duration
             last_boot = None
 
     return {
-        "total": round(total_uptime, 2),
-        "current": round(current_uptime, 2),
+        "total": round(total_uptime / _ONE_HOUR, 2),
+        "current": round(current_uptime / _ONE_HOUR, 2),
         "lastBoot": last_boot.isoformat() if last_boot else None,
     }
 
@@ -237,142 +334,192 @@ def calculate_user_sessions(history: List[dict]) -> List[dict]:
 
 def calculate_resource_usage(history: List[dict]) -> dict:
     """Calculate system resource usage."""
-    cpu_usage = []
-    memory_usage = []
-    disk_usage = []
+    # One flat list per metric; per-entry dicts are only built for the
+    # last 100 states that end up in the history output, which the
+    # bounded deques keep track of while the totals run over everything
+    cpu_values = []
+    per_core_values = []
+    memory_values = []
+    swap_values = []
+    disk_values = []
+    disk_read = []
+    disk_write = []
     gpu_usage = []  # New GPU metrics
-    network_interfaces = defaultdict(list)  # Per-interface stats
-    temperatures = defaultdict(list)  # Temperature sensors
-    processes = defaultdict(lambda: {
-        "cpu": 0,
-        "memory": 0,
-        "io_read": 0,
-        "io_write": 0,
-        "network": 0,
-    })
-
-    for state in history:
-        timestamp = state.last_updated.isoformat()
+    gpu_memory = []
+    gpu_recent = deque(maxlen=100)
+    # iface -> [recent entries, bytes_recv, bytes_sent, errors, drops]
+    network_interfaces = defaultdict(lambda: [deque(maxlen=100), 0, 0, 0, 0])
+    # sensor -> (recent entries, all readings)
+    temperatures = defaultdict(lambda: (deque(maxlen=100), []))
+    # name -> [cpu, memory, io_read, io_write, network] running totals
+    processes: Dict[str, List[float]] = {}
+
+    for index, state in enumerate(history):
         attrs = state.attributes
 
         # Basic metrics
-        cpu_usage.append({
-            "timestamp": timestamp,
-            "value": attrs.get("cpu_percent", 0),
-            "per_core": attrs.get("cpu_per_core", []),
-        })
-        memory_usage.append({
-            "timestamp": timestamp,
-            "value": attrs.get("memory_percent", 0),
-            "virtual": attrs.get("virtual_memory", 0),
-            "swap": attrs.get("swap_memory", 0),
-        })
-        disk_usage.append({
-            "timestamp": timestamp,
-            "value": attrs.get("disk_percent", 0),
-            "read_bytes": attrs.get("disk_read", 0),
-            "write_bytes": attrs.get("disk_write", 0),
-            "per_disk": attrs.get("disk_per_device", {}),
-        })
+        cpu_values.append(attrs.get("cpu_percent", 0))
+        per_core_values.append(attrs.get("cpu_per_core", []))
+        memory_values.append(attrs.get("memory_percent", 0))
+        swap_values.append(attrs.get("swap_memory", 0))
+        disk_values.append(attrs.get("disk_percent", 0))
+        disk_read.append(attrs.get("disk_read", 0))
+        disk_write.append(attrs.get("disk_write", 0))
 
         # GPU metrics
         if "gpu_percent" in attrs:
-            gpu_usage.append({
-                "timestamp": timestamp,
-                "usage": attrs.get("gpu_percent", 0),
-                "memory": attrs.get("gpu_memory", 0),
-                "temperature": attrs.get("gpu_temp", 0),
-            })
+            gpu_usage.append(attrs["gpu_percent"])
+            gpu_memory.append(attrs.get("gpu_memory", 0))
+            gpu_recent.append(index)
 
         # Network interface details
         for iface, stats in attrs.get("network_interfaces", {}).items():
-            network_interfaces[iface].append({
-                "timestamp": timestamp,
-                "download": stats.get("bytes_recv", 0),
-                "upload": stats.get("bytes_sent", 0),
-                "packets_recv": stats.get("packets_recv", 0),
-                "packets_sent": stats.get("packets_sent", 0),
-                "errors": stats.get("errors", 0),
-                "drops": stats.get("drops", 0),
-            })
+            data = network_interfaces[iface]
+            data[0].append((index, stats))
+            data[1] += stats.get("bytes_recv", 0)
+            data[2] += stats.get("bytes_sent", 0)
+            data[3] += stats.get("errors", 0)
+            data[4] += stats.get("drops", 0)
 
         # Temperature sensors
         for sensor, temp in attrs.get("temperatures", {}).items():
-            temperatures[sensor].append({
-                "timestamp": timestamp,
-                "value": temp,
-            })
+            recent_temps, readings = temperatures[sensor]
+            recent_temps.append((index, temp))
+            readings.append(temp)
 
         # Process details
         for proc in attrs.get("processes", []):
-            processes[proc["name"]].update({
-                "cpu": processes[proc["name"]]["cpu"] + proc.get("cpu_percent", 0),
-                "memory": processes[proc["name"]]["memory"] + proc.get("memory_percent", 0),
-                "io_read": processes[proc["name"]]["io_read"] + proc.get("io_read_bytes", 0),
-                "io_write": processes[proc["name"]]["io_write"] + proc.get("io_write_bytes", 0),
-                "network": processes[proc["name"]]["network"] + proc.get("network_bytes", 0),
-            })
+            totals = processes.get(proc["name"])
+            if totals is None:
+                totals = processes[proc["name"]] = [0, 0, 0, 0, 0]
+            totals[0] += proc.get("cpu_percent", 0)
+            totals[1] += proc.get("memory_percent", 0)
+            totals[2] += proc.get("io_read_bytes", 0)
+            totals[3] += proc.get("io_write_bytes", 0)
+            totals[4] += proc.get("network_bytes", 0)
 
     # Process the data for visualization
     process_stats = {
         name: {
-            "cpu": round(stats["cpu"] / len(history), 2),
-            "memory": round(stats["memory"] / len(history), 2),
-            "io_read": round(stats["io_read"] / (1024 * 1024), 2),  # MB
-            "io_write": round(stats["io_write"] / (1024 * 1024), 2),  # MB
-            "network": round(stats["network"] / (1024 * 1024), 2),  # MB
+            "cpu": round(cpu / len(history), 2),
+            "memory": round(memory / len(history), 2),
+            "io_read": round(io_read / (1024 * 1024), 2),  # MB
+            "io_write": round(io_write / (1024 * 1024), 2),  # MB
+            "network": round(network / (1024 * 1024), 2),  # MB
         }
-        for name, stats in processes.items()
+        for name, (cpu, memory, io_read, io_write, network) in processes.items()
     }
 
+    # Format each state's timestamp at most once, however many of the
+    # metric histories below include that state
+    timestamps: List[Optional[str]] = [None] * len(history)
+
+    def timestamp_at(index: int) -> str:
+        timestamp = timestamps[index]
+        if timestamp is None:
+            timestamp = timestamps[index] = history[index].last_updated.isoformat()
+        return timestamp
+
+    recent = [
+        (timestamp_at(index), history[index].attributes)
+        for index in range(max(len(history) - 100, 0), len(history))
+    ]
+
     return {
         "cpu": {
-            "history": cpu_usage[-100:],
-            "average": round(sum(c["value"] for c in cpu_usage) / len(cpu_usage), 2),
-            "peak": round(max(c["value"] for c in cpu_usage), 2),
+            "history": [
+                {
+                    "timestamp": timestamp,
+                    "value": attrs.get("cpu_percent", 0),
+                    "per_core": attrs.get("cpu_per_core", []),
+                }
+                for timestamp, attrs in recent
+            ],
+            "average": round(sum(cpu_values) / len(cpu_values), 2),
+            "peak": round(max(cpu_values), 2),
             "per_core_avg": [
-                round(sum(core) / len(cpu_usage), 2)
-                for core in zip(*(c["per_core"] for c in cpu_usage if "per_core" in c))
-            ] if any("per_core" in c for c in cpu_usage) else [],
+                round(sum(core) / len(cpu_values), 2)
+                for core in zip(*per_core_values)
+            ] if per_core_values else [],
         },
         "memory": {
-            "history": memory_usage[-100:],
-            "average": round(sum(m["value"] for m in memory_usage) / len(memory_usage), 2),
-            "peak": round(max(m["value"] for m in memory_usage), 2),
-            "swap_avg": round(sum(m["swap"] for m in memory_usage) / len(memory_usage), 2),
+            "history": [
+                {
+                    "timestamp": timestamp,
+                    "value": attrs.get("memory_percent", 0),
+                    "virtual": attrs.get("virtual_memory", 0),
+                    "swap": attrs.get("swap_memory", 0),
+                }
+                for timestamp, attrs in recent
+            ],
+            "average": round(sum(memory_values) / len(memory_values), 2),
+            "peak": round(max(memory_values), 2),
+            "swap_avg": round(sum(swap_values) / len(memory_values), 2),
         },
         "disk": {
-            "history": disk_usage[-100:],
-            "average": round(sum(d["value"] for d in disk_usage) / len(disk_usage), 2),
-            "peak": round(max(d["value"] for d in disk_usage), 2),
+            "history": [
+                {
+                    "timestamp": timestamp,
+                    "value": attrs.get("disk_percent", 0),
+                    "read_bytes": attrs.get("disk_read", 0),
+                    "write_bytes": attrs.get("disk_write", 0),
+                    "per_disk": attrs.get("disk_per_device", {}),
+                }
+                for timestamp, attrs in recent
+            ],
+            "average": round(sum(disk_values) / len(disk_values), 2),
+            "peak": round(max(disk_values), 2),
             "io_stats": {
-                "read": round(sum(d["read_bytes"] for d in disk_usage) / (1024 * 1024), 2),  # MB
-                "write": round(sum(d["write_bytes"] for d in disk_usage) / (1024 * 1024), 2),  # MB
+                "read": round(sum(disk_read) / (1024 * 1024), 2),  # MB
+                "write": round(sum(disk_write) / (1024 * 1024), 2),  # MB
             },
         },
         "gpu": {
-            "history": gpu_usage[-100:],
-            "average": round(sum(g["usage"] for g in gpu_usage) / len(gpu_usage), 2) if gpu_usage else 0,
-            "peak": round(max(g["usage"] for g in gpu_usage), 2) if gpu_usage else 0,
-            "memory_avg": round(sum(g["memory"] for g in gpu_usage) / len(gpu_usage), 2) if gpu_usage else 0,
+            "history": [
+                {
+                    "timestamp": timestamp_at(index),
+                    "usage": history[index].attributes.get("gpu_percent", 0),
+                    "memory": history[index].attributes.get("gpu_memory", 0),
+                    "temperature": history[index].attributes.get("gpu_temp", 0),
+                }
+                for index in gpu_recent
+            ],
+            "average": round(sum(gpu_usage) / len(gpu_usage), 2) if gpu_usage else 0,
+            "peak": round(max(gpu_usage), 2) if gpu_usage else 0,
+            "memory_avg": round(sum(gpu_memory) / len(gpu_memory), 2) if gpu_usage else 0,
         },
         "network_interfaces": {
             iface: {
-                "history": data[-100:],
-                "total_download": round(sum(d["download"] for d in data) / (1024 * 1024), 2),  # MB
-                "total_upload": round(sum(d["upload"] for d in data) / (1024 * 1024), 2),  # MB
-                "errors": sum(d["errors"] for d in data),
-                "drops": sum(d["drops"] for d in data),
+                "history": [
+                    {
+                        "timestamp": timestamp_at(index),
+                        "download": stats.get("bytes_recv", 0),
+                        "upload": stats.get("bytes_sent", 0),
+                        "packets_recv": stats.get("packets_recv", 0),
+                        "packets_sent": stats.get("packets_sent", 0),
+                        "errors": stats.get("errors", 0),
+                        "drops": stats.get("drops", 0),
+                    }
+                    for index, stats in recent_stats
+                ],
+                "total_download": round(bytes_recv / (1024 * 1024), 2),  # MB
+                "total_upload": round(bytes_sent / (1024 * 1024), 2),  # MB
+                "errors": errors,
+                "drops": drops,
             }
-            for iface, data in network_interfaces.items()
+            for iface, (recent_stats, bytes_recv, bytes_sent, errors, drops)
+            in network_interfaces.items()
         },
         "temperatures": {
             sensor: {
-                "history": data[-100:],
-                "average": round(sum(t["value"] for t in data) / len(data), 2),
-                "peak": round(max(t["value"] for t in data), 2),
+                "history": [
+                    {"timestamp": timestamp_at(index), "value": temp}
+                    for index, temp in recent_temps
+                ],
+                "average": round(sum(readings) / len(readings), 2),
+                "peak": round(max(readings), 2),
             }
-            for sensor, data in temperatures.items()
+            for sensor, (recent_temps, readings) in temperatures.items()
         },
         "processes": process_stats,
     }
@@ -382,24 +529,29 @@ def calculate_session_duration(session: List[dict]) -> float:
     if not session:
         return 0
     end_time = session[-1].last_updated if len(session) > 1 else datetime.now()
-    return (end_time - session[0].last_updated).total_seconds() / 3600
+    return (end_time - session[0].last_updated) / _ONE_HOUR
 
-def calculate_session_activities(session: List[dict]) -> List[dict]:
+def calculate_session_activities(
+    session: List[dict],
+    durations: Optional[List[float]] = None
+) -> List[dict]:
     """Calculate activities during a session."""
+    if durations is None:
+        durations = precompute_durations(session)
     activities = []
     current_activity = None
     activity_durations = defaultdict(int)
     process_durations = defaultdict(int)
     category_durations = defaultdict(int)
-    hourly_activity = defaultdict(lambda: defaultdict(int))
+    hourly_activity = [defaultdict(int) for _ in range(24)]
 
     for i, state in enumerate(session):
         activity = state.attributes.get("activity")
-        category = state.attributes.get("category", "Uncategorized")
-        process = state.attributes.get("process", "Unknown")
         
         if activity != current_activity:
-            duration = calculate_state_duration(state, session)
+            category = intern_value(state.attributes.get("category", "Uncategorized"))
+            process = intern_value(state.attributes.get("process", "Unknown"))
+            duration = durations[i]
             hour = state.last_updated.hour
             
             activities.append({
@@ -431,7 +583,8 @@ def calculate_session_activities(session: List[dict]) -> List[dict]:
                 for cat, duration in cats.items()
             ],
         }
-        for hour, cats in sorted(hourly_activity.items())
+        for hour, cats in enumerate(hourly_activity)
+        if cats
     ]
 
     return {
@@ -455,87 +608,101 @@ def calculate_session_activities(session: List[dict]) -> List[dict]:
 
 def calculate_session_resources(session: List[dict]) -> dict:
     """Calculate resource usage during a session."""
+    cpu = []
+    memory = []
+    for state in session:
+        timestamp = state.last_updated.isoformat()
+        attributes = state.attributes
+        cpu.append({"timestamp": timestamp, "value": attributes.get("cpu_percent", 0)})
+        memory.append({"timestamp": timestamp, "value": attributes.get("memory_percent", 0)})
+
     return {
-        "cpu": [
-            {
-                "timestamp": state.last_updated.isoformat(),
-                "value": state.attributes.get("cpu_percent", 0),
-            }
-            for state in session
-        ],
-        "memory": [
-            {
-                "timestamp": state.last_updated.isoformat(),
-                "value": state.attributes.get("memory_percent", 0),
-            }
-            for state in session
-        ],
+        "cpu": cpu,
+        "memory": memory,
     }
 
 def calculate_session_network(session: List[dict]) -> dict:
     """Calculate network usage during a session."""
-    total_download = sum(state.attributes.get("network_download", 0) for state in session)
-    total_upload = sum(state.attributes.get("network_upload", 0) for state in session)
+    total_download = 0
+    total_upload = 0
+    history = []
+    for state in session:
+        download = state.attributes.get("network_download", 0)
+        upload = state.attributes.get("network_upload", 0)
+        total_download += download
+        total_upload += upload
+        history.append({
+            "timestamp": state.last_updated.isoformat(),
+            "download": round(download / (1024 * 1024), 2),
+            "upload": round(upload / (1024 * 1024), 2),
+        })
 
     return {
         "download": round(total_download / (1024 * 1024), 2),  # MB
         "upload": round(total_upload / (1024 * 1024), 2),
-        "history": [
-            {
-                "timestamp": state.last_updated.isoformat(),
-                "download": round(state.attributes.get("network_download", 0) / (1024 * 1024), 2),
-                "upload": round(state.attributes.get("network_upload", 0) / (1024 * 1024), 2),
-            }
-            for state in session
-        ],
+        "history": history,
     }
 
-def calculate_peak_hours(history: List[dict]) -> List[dict]:
+def calculate_peak_hours(
+    history: List[dict],
+    index: Optional[HistoryIndex] = None
+) -> List[dict]:
     """Calculate peak usage hours."""
-    hourly_counts = defaultdict(int)
-    for state in history:
-        hour = state.last_updated.hour
-        duration = calculate_state_duration(state, history)
+    if index is None:
+        index = index_history(history)
+    hourly_counts = [0] * 24
+    for hour, duration in zip(index.hours, index.durations):
         hourly_counts[hour] += duration
 
     # Find the top 5 peak hours
     peak_hours = sorted(
-        [{"hour": hour, "usage": round(usage)} for hour, usage in hourly_counts.items()],
+        [{"hour": hour, "usage": round(usage)}
+         for hour, usage in enumerate(hourly_counts) if usage],
         key=lambda x: x["usage"],
         reverse=True,
     )[:5]
 
     return peak_hours
 
-def calculate_hourly_usage(history: List[dict]) -> List[dict]:
+def calculate_hourly_usage(
+    history: List[dict],
+    index: Optional[HistoryIndex] = None
+) -> List[dict]:
     """Calculate usage by hour for the last 24 hours."""
+    if index is None:
+        index = index_history(history)
     now = datetime.now()
     yesterday = now - timedelta(days=1)
-    
+
+    # Bucket every state of the window in one pass instead of 24 scans
+    usage = [0] * 24
+    first = bisect_left(history, yesterday, key=_LAST_UPDATED)
+    last = bisect_left(history, yesterday + timedelta(hours=24), lo=first, key=_LAST_UPDATED)
+    for i in range(first, last):
+        usage[(history[i].last_updated - yesterday) // _ONE_HOUR] += index.durations[i]
+
     hourly_data = []
     for hour in range(24):
         time_point = yesterday + timedelta(hours=hour)
-        usage = sum(
-            calculate_state_duration(state, history)
-            for state in history
-            if time_point <= state.last_updated < time_point + timedelta(hours=1)
-        )
         hourly_data.append({
             "hour": hour,
-            "usage": round(usage),
+            "usage": round(usage[hour]),
             "timestamp": time_point.isoformat(),
         })
 
     return hourly_data
 
-def calculate_category_comparison(history: List[dict]) -> dict:
+def calculate_category_comparison(
+    history: List[dict],
+    index: Optional[HistoryIndex] = None
+) -> dict:
     """Calculate category usage comparison."""
+    if index is None:
+        index = index_history(history)
     category_usage = defaultdict(int)
     category_limits = {}
     
-    for state in history:
-        category = state.attributes.get("category", "Uncategorized")
-        duration = calculate_state_duration(state, history)
+    for state, category, duration in zip(history, index.categories, index.durations):
         category_usage[category] += duration
         category_limits[category] = state.attributes.get("time_limit", 0)
 
@@ -550,70 +717,111 @@ def calculate_category_comparison(history: List[dict]) -> dict:
         ],
     }
 
-def calculate_trend_analysis(history: List[dict], start_time: datetime) -> List[dict]:
+def calculate_trend_analysis(
+    history: List[dict],
+    start_time: datetime,
+    index: Optional[HistoryIndex] = None
+) -> List[dict]:
     """Calculate usage trends over time."""
+    if index is None:
+        index = index_history(history)
     daily_usage = defaultdict(lambda: defaultdict(int))
     
-    for state in history:
-        day = state.last_updated.date()
-        category = state.attributes.get("category", "Uncategorized")
-        duration = calculate_state_duration(state, history)
+    for day, category, duration in zip(index.dates, index.categories, index.durations):
         daily_usage[day][category] += duration
 
     trend_data = []
     current = start_time.date()
     end = datetime.now().date()
+    all_cats = sorted({cat for day_usage in daily_usage.values() for cat in day_usage})
     
     while current <= end:
+        day_usage = daily_usage.get(current, {})
         trend_data.append({
             "date": current.isoformat(),
             "categories": [
-                {"name": cat, "usage": round(daily_usage[current][cat])}
-                for cat in set(cat for day_usage in daily_usage.values() for cat in day_usage)
+                {"name": cat, "usage": round(day_usage.get(cat, 0))}
+                for cat in all_cats
             ],
         })
         current += timedelta(days=1)
 
     return trend_data
 
-def calculate_state_duration(state: dict, history: List[dict]) -> float:
-    """Calculate duration of a state in minutes."""
-    next_state = next(
-        (s for s in history if s.last_updated > state.last_updated),
-        None
-    )
-    duration = (
-        (next_state.last_updated if next_state else datetime.now()) - state.last_updated
-    ).total_seconds() / 60
-    return duration
-
-def calculate_period_stats(history: List[dict], start_time: datetime, end_time: datetime) -> List[dict]:
+def index_history(history: List[dict]) -> HistoryIndex:
+    """Extract the values every activity calculation needs in one pass."""
+    hours = []
+    dates = []
+    categories = []
+    processes = []
+    for state in history:
+        last_updated = state.last_updated
+        hours.append(last_updated.hour)
+        dates.append(last_updated.date())
+        # The recorder decodes attributes per row, so every state carries its
+        # own copy of the same few names until they are interned
+        categories.append(intern_value(state.attributes.get("category", "Uncategorized")))
+        processes.append(intern_value(state.attributes.get("process", "Unknown")))
+    return HistoryIndex(precompute_durations(history), hours, dates, categories, processes)
+
+def precompute_durations(history: List[dict]) -> List[float]:
+    """Calculate the duration in minutes of every state in one pass.
+
+    Expects history ordered by last_updated, as the recorder returns it.
+    A state lasts until the next state with a later timestamp, or until
+    now if there is none.
+    """
+    durations = [0.0] * len(history)
+    next_time = datetime.now()
+    later = None
+    for i in range(len(history) - 1, -1, -1):
+        last_updated = history[i].last_updated
+        if later is not None and later > last_updated:
+            next_time = later
+        durations[i] = (next_time - last_updated) / _ONE_MINUTE
+        later = last_updated
+    return durations
+
+def calculate_period_stats(
+    history: List[dict],
+    start_time: datetime,
+    end_time: datetime,
+    index: Optional[HistoryIndex] = None
+) -> List[dict]:
     """Calculate statistics for a specific time period."""
+    if index is None:
+        index = index_history(history)
     categories: Dict[str, dict] = {}
-    
-    for state in history:
-        if not (start_time <= state.last_updated <= end_time):
-            continue
 
-        category = state.attributes.get("category", "Uncategorized")
-        if category not in categories:
-            categories[category] = {
+    # Bound the period by binary search instead of testing every state
+    first = bisect_left(history, start_time, key=_LAST_UPDATED)
+    last = bisect_right(history, end_time, lo=first, key=_LAST_UPDATED)
+
+    durations = index.durations
+    hours = index.hours
+    categories_at = index.categories
+    processes_at = index.processes
+    for i in range(first, last):
+        state = history[i]
+        duration = durations[i]
+        category = categories_at[i]
+        cat = categories.get(category)
+        if cat is None:
+            cat = categories[category] = {
                 "name": category,
                 "timeUsed": 0,
                 "timeLimit": state.attributes.get("time_limit", 0),
                 "lastActivity": state.last_updated.isoformat(),
                 "processes": {},
-                "peakHours": defaultdict(int),
+                "peakHours": [0] * 24,
             }
 
-        duration = calculate_state_duration(state, history)
-        categories[category]["timeUsed"] += duration
-        categories[category]["peakHours"][state.last_updated.hour] += duration
+        cat["timeUsed"] += duration
+        cat["peakHours"][hours[i]] += duration
         
-        process = state.attributes.get("process", "Unknown")
-        if process not in categories[category]["processes"]:
-            categories[category]["processes"][process] = 0
-        categories[category]["processes"][process] += duration
+        process = processes_at[i]
+        processes = cat["processes"]
+        processes[process] = processes.get(process, 0) + duration
 
     return [
         {
@@ -629,7 +837,7 @@ def calculate_period_stats(history: List[dict], start_time: datetime, end_time:
             )[:5],
             "peakHours": sorted(
                 [{"hour": hour, "usage": round(usage)}
-                 for hour, usage in cat["peakHours"].items()],
+                 for hour, usage in enumerate(cat["peakHours"]) if usage],
                 key=lambda x: x["usage"],
                 reverse=True,
             )[:3],
@@ -0,0 +1,7 @@
+"""Helpers shared across Timewise Guardian modules."""
+import sys
+from typing import Any
+
+def intern_value(value: Any) -> Any:
+    """Intern a low-cardinality string received from clients or the recorder."""
+    return sys.intern(value) if type(value) is str else value
@@ -1,14 +1,19 @@
 """WebSocket API for Timewise Guardian."""
 from typing import Any, Callable, Dict, List
+from contextlib import aclosing
 from datetime import datetime
+from functools import lru_cache
+import time
 
 import voluptuous as vol
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant
 from homeassistant.components.websocket_api import (
     async_register_command,
     websocket_command,
     require_admin,
     ActiveConnection,
+    event_message,
     ERR_NOT_FOUND,
     ERR_INVALID_FORMAT,
 )
@@ -20,183 +25,319 @@ from .database import Database, PermissionDenied
 class DatabaseError(HomeAssistantError):
     """Database operation error."""
 
-async def async_setup_websocket_api(hass: HomeAssistant) -> None:
-    """Set up WebSocket API."""
-    
-    @websocket_command({
-        vol.Required('type'): 'twg/register_computer',
-        vol.Required('computer_info'): {
-            vol.Required('id'): str,
-            vol.Required('name'): str,
-            vol.Required('os'): str,
-            vol.Optional('version'): str,
-        },
-    })
-    async def websocket_register_computer(
-        hass: HomeAssistant,
-        connection: ActiveConnection,
-        msg: Dict[str, Any]
-    ) -> None:
-        """Register a computer with Timewise Guardian."""
-        try:
-            entry_id = connection.context.get("entry_id")
-            if not entry_id or entry_id not in hass.data[DOMAIN]:
-                raise ValueError("Invalid entry_id")
+# Clients re-register on every reconnect; unchanged details within this
+# window are acknowledged without calling register_computer again
+REGISTRATION_CACHE_TTL = 600
 
-            register_computer = hass.data[DOMAIN][entry_id]["register_computer"]
-            await register_computer(msg["computer_info"])
-            
-            connection.send_result(msg["id"], {
-                "success": True,
-                "computer_id": msg["computer_info"]["id"]
-            })
-        except Exception as err:
-            connection.send_error(msg["id"], "registration_failed", str(err))
-
-    @websocket_command({
-        vol.Required('type'): 'twg/get_roles',
-    })
-    @require_admin
-    async def websocket_get_roles(
-        hass: HomeAssistant,
-        connection: ActiveConnection,
-        msg: Dict[str, Any]
-    ) -> None:
-        """Get all roles."""
-        try:
-            db = Database()
-            roles = db.get_roles()
-            connection.send_result(msg['id'], {'roles': roles})
-        except Exception as err:
-            connection.send_error(msg['id'], 'database_error', str(err))
-
-    @websocket_command({
-        vol.Required('type'): 'twg/create_role',
+@lru_cache(maxsize=256)
+def _parse_iso(value: str) -> datetime:
+    """Parse an ISO timestamp; clients tend to resend the same few expiries."""
+    return datetime.fromisoformat(value)
+
+# Handlers and their schemas live at module level so they are built once at
+# import rather than on every setup; the database comes from hass.data
+
+@websocket_command({
+    vol.Required('type'): 'twg/register_computer',
+    vol.Required('computer_info'): {
+        vol.Required('id'): str,
         vol.Required('name'): str,
-        vol.Required('description'): str,
-        vol.Optional('permissions'): [str],
-    })
-    @require_admin
-    async def websocket_create_role(
-        hass: HomeAssistant,
-        connection: ActiveConnection,
-        msg: Dict[str, Any]
-    ) -> None:
-        """Create a new role."""
-        try:
-            db = Database()
-            role_id = db.create_role(
-                name=msg['name'],
-                description=msg['description'],
-                permissions=msg.get('permissions', [])
-            )
-            connection.send_result(msg['id'], {'success': True, 'role_id': role_id})
-        except PermissionDenied as err:
-            connection.send_error(msg['id'], 'permission_denied', str(err))
-        except Exception as err:
-            connection.send_error(msg['id'], 'create_failed', str(err))
-
-    @websocket_command({
-        vol.Required('type'): 'twg/update_role',
-        vol.Required('role_id'): int,
-        vol.Optional('name'): str,
-        vol.Optional('description'): str,
-        vol.Optional('permissions'): [str],
-    })
-    @require_admin
-    async def websocket_update_role(
-        hass: HomeAssistant,
-        connection: ActiveConnection,
-        msg: Dict[str, Any]
-    ) -> None:
-        """Update a role."""
-        try:
-            db = Database()
-            db.update_role(
-                role_id=msg['role_id'],
-                name=msg.get('name'),
-                description=msg.get('description'),
-                permissions=msg.get('permissions')
-            )
-            connection.send_result(msg['id'], {'success': True})
-        except PermissionDenied as err:
-            connection.send_error(msg['id'], 'permission_denied', str(err))
-        except Exception as err:
-            connection.send_error(msg['id'], 'update_failed', str(err))
-
-    @websocket_command({
-        vol.Required('type'): 'twg/delete_role',
-        vol.Required('role_id'): int,
-    })
-    @require_admin
-    async def websocket_delete_role(
-        hass: HomeAssistant,
-        connection: ActiveConnection,
-        msg: Dict[str, Any]
-    ) -> None:
-        """Delete a role."""
-        try:
-            db = Database()
-            db.delete_role(msg['role_id'])
-            connection.send_result(msg['id'], {'success': True})
-        except PermissionDenied as err:
-            connection.send_error(msg['id'], 'permission_denied', str(err))
-        except Exception as err:
-            connection.send_error(msg['id'], 'delete_failed', str(err))
-
-    @websocket_command({
-        vol.Required('type'): 'twg/get_user_permissions',
-        vol.Required('user_id'): int,
-    })
-    async def websocket_get_user_permissions(
-        hass: HomeAssistant,
-        connection: ActiveConnection,
-        msg: Dict[str, Any]
-    ) -> None:
-        """Get permissions for a user."""
-        try:
-            db = Database()
-            permissions = db.get_user_permissions(msg['user_id'])
-            connection.send_result(msg['id'], {'permissions': permissions})
-        except Exception as err:
-            connection.send_error(msg['id'], 'fetch_failed', str(err))
-
-    @websocket_command({
-        vol.Required('type'): 'twg/grant_permission',
+        vol.Required('os'): str,
+        vol.Optional('version'): str,
+    },
+})
+async def websocket_register_computer(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Register a computer with Timewise Guardian."""
+    try:
+        entry_id = connection.context.get("entry_id")
+        if not entry_id or entry_id not in hass.data[DOMAIN]:
+            raise ValueError("Invalid entry_id")
+
+        info = msg["computer_info"]
+        key = (entry_id, info["id"], info["name"], info["os"], info.get("version"))
+        registered: Dict[tuple, float] = hass.data[DOMAIN].setdefault("registered", {})
+        now = time.monotonic()
+        cached = registered.get(key, 0) > now
+        if not cached:
+            register_computer = hass.data[DOMAIN][entry_id]["register_computer"]
+            await register_computer(info)
+            for stale in [k for k, expires in registered.items() if expires <= now]:
+                del registered[stale]
+            registered[key] = now + REGISTRATION_CACHE_TTL
+
+        connection.send_result(msg["id"], {
+            "success": True,
+            "computer_id": info["id"],
+            "cached": cached,
+        })
+    except Exception as err:
+        connection.send_error(msg["id"], "registration_failed", str(err))
+
+@websocket_command({
+    vol.Required('type'): 'twg/get_roles',
+})
+@require_admin
+async def websocket_get_roles(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Get all roles."""
+    try:
+        db: Database = hass.data[DOMAIN]["db"]
+        roles = await db.async_get_roles()
+        connection.send_result(msg['id'], {'roles': roles})
+    except Exception as err:
+        connection.send_error(msg['id'], 'database_error', str(err))
+
+@websocket_command({
+    vol.Required('type'): 'twg/create_role',
+    vol.Required('name'): str,
+    vol.Required('description'): str,
+    vol.Optional('permissions'): [str],
+})
+@require_admin
+async def websocket_create_role(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Create a new role."""
+    try:
+        db: Database = hass.data[DOMAIN]["db"]
+        role_id = await db.async_create_role(
+            name=msg['name'],
+            description=msg['description'],
+            permissions=msg.get('permissions', [])
+        )
+        connection.send_result(msg['id'], {'success': True, 'role_id': role_id})
+    except PermissionDenied as err:
+        connection.send_error(msg['id'], 'permission_denied', str(err))
+    except Exception as err:
+        connection.send_error(msg['id'], 'create_failed', str(err))
+
+@websocket_command({
+    vol.Required('type'): 'twg/update_role',
+    vol.Required('role_id'): int,
+    vol.Optional('name'): str,
+    vol.Optional('description'): str,
+    vol.Optional('permissions'): [str],
+})
+@require_admin
+async def websocket_update_role(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Update a role."""
+    try:
+        db: Database = hass.data[DOMAIN]["db"]
+        await db.async_update_role(
+            role_id=msg['role_id'],
+            name=msg.get('name'),
+            description=msg.get('description'),
+            permissions=msg.get('permissions')
+        )
+        connection.send_result(msg['id'], {'success': True})
+    except PermissionDenied as err:
+        connection.send_error(msg['id'], 'permission_denied', str(err))
+    except Exception as err:
+        connection.send_error(msg['id'], 'update_failed', str(err))
+
+@websocket_command({
+    vol.Required('type'): 'twg/delete_role',
+    vol.Required('role_id'): int,
+})
+@require_admin
+async def websocket_delete_role(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Delete a role."""
+    try:
+        db: Database = hass.data[DOMAIN]["db"]
+        await db.async_delete_role(msg['role_id'])
+        connection.send_result(msg['id'], {'success': True})
+    except PermissionDenied as err:
+        connection.send_error(msg['id'], 'permission_denied', str(err))
+    except Exception as err:
+        connection.send_error(msg['id'], 'delete_failed', str(err))
+
+@websocket_command({
+    vol.Required('type'): 'twg/get_user_permissions',
+    vol.Required('user_id'): int,
+})
+async def websocket_get_user_permissions(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Get permissions for a user."""
+    try:
+        db: Database = hass.data[DOMAIN]["db"]
+        permissions = await db.async_get_user_permissions(msg['user_id'])
+        connection.send_result(msg['id'], {'permissions': permissions})
+    except Exception as err:
+        connection.send_error(msg['id'], 'fetch_failed', str(err))
+
+@websocket_command({
+    vol.Required('type'): 'twg/grant_permission',
+    vol.Required('user_id'): int,
+    vol.Required('permission'): str,
+    vol.Optional('expires_at'): str,
+    vol.Optional('reason'): str,
+})
+@require_admin
+async def websocket_grant_permission(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Grant a permission to a user."""
+    try:
+        db: Database = hass.data[DOMAIN]["db"]
+        expires_at = None
+        if msg.get('expires_at'):
+            try:
+                expires_at = _parse_iso(msg['expires_at'])
+            except ValueError as err:
+                connection.send_error(msg['id'], ERR_INVALID_FORMAT, f"Invalid date format: {err}")
+                return
+
+        await db.async_grant_permission(
+            user_id=msg['user_id'],
+            permission_name=msg['permission'],
+            granted_by=connection.user.id,
+            expires_at=expires_at,
+            reason=msg.get('reason')
+        )
+        connection.send_result(msg['id'], {'success': True})
+    except PermissionDenied as err:
+        connection.send_error(msg['id'], 'permission_denied', str(err))
+    except Exception as err:
+        connection.send_error(msg['id'], 'grant_failed', str(err))
+
+@websocket_command({
+    vol.Required('type'): 'twg/check_permissions',
+    vol.Required('checks'): [{
         vol.Required('user_id'): int,
         vol.Required('permission'): str,
-        vol.Optional('expires_at'): str,
-        vol.Optional('reason'): str,
-    })
-    @require_admin
-    async def websocket_grant_permission(
-        hass: HomeAssistant,
-        connection: ActiveConnection,
-        msg: Dict[str, Any]
-    ) -> None:
-        """Grant a permission to a user."""
-        try:
-            db = Database()
-            expires_at = None
-            if msg.get('expires_at'):
-                try:
-                    expires_at = datetime.fromisoformat(msg['expires_at'])
-                except ValueError as err:
-                    connection.send_error(msg['id'], ERR_INVALID_FORMAT, f"Invalid date format: {err}")
-                    return
-            
-            db.grant_permission(
-                user_id=msg['user_id'],
-                permission_name=msg['permission'],
-                granted_by=connection.user.id,
-                expires_at=expires_at,
-                reason=msg.get('reason')
-            )
-            connection.send_result(msg['id'], {'success': True})
-        except PermissionDenied as err:
-            connection.send_error(msg['id'], 'permission_denied', str(err))
-        except Exception as err:
-            connection.send_error(msg['id'], 'grant_failed', str(err))
+    }],
+})
+async def websocket_check_permissions(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Check several user permissions in one round trip."""
+    try:
+        db: Database = hass.data[DOMAIN]["db"]
+        checks = msg['checks']
+        allowed = await db.async_check_permissions(
+            [(check['user_id'], check['permission']) for check in checks]
+        )
+        connection.send_result(msg['id'], {
+            'results': [
+                {**check, 'allowed': result}
+                for check, result in zip(checks, allowed)
+            ],
+        })
+    except Exception as err:
+        connection.send_error(msg['id'], 'fetch_failed', str(err))
+
+@websocket_command({
+    vol.Required('type'): 'twg/get_audit_log',
+    vol.Optional('user_id'): str,
+    vol.Optional('action'): str,
+    vol.Optional('target_type'): str,
+    vol.Optional('target_id'): str,
+    vol.Optional('limit', default=100): vol.All(int, vol.Range(min=1, max=500)),
+    vol.Optional('cursor'): int,
+})
+@require_admin
+async def websocket_get_audit_log(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Get a page of audit log entries, newest first.
+
+    Pass the returned next_cursor back as cursor to fetch the next page.
+    """
+    try:
+        db: Database = hass.data[DOMAIN]["db"]
+        logs = await db.async_get_audit_log(
+            user_id=msg.get('user_id'),
+            action=msg.get('action'),
+            target_type=msg.get('target_type'),
+            target_id=msg.get('target_id'),
+            limit=msg['limit'],
+            before_id=msg.get('cursor')
+        )
+        connection.send_result(msg['id'], {
+            'logs': logs,
+            # A short page means there is nothing older left to fetch
+            'next_cursor': logs[-1]['id'] if len(logs) == msg['limit'] else None,
+        })
+    except Exception as err:
+        connection.send_error(msg['id'], 'fetch_failed', str(err))
+
+@websocket_command({
+    vol.Required('type'): 'twg/stream_audit_log',
+    vol.Optional('user_id'): str,
+    vol.Optional('action'): str,
+    vol.Optional('target_type'): str,
+    vol.Optional('target_id'): str,
+    vol.Optional('limit', default=1000): vol.All(int, vol.Range(min=1, max=10000)),
+    vol.Optional('cursor'): int,
+})
+@require_admin
+async def websocket_stream_audit_log(
+    hass: HomeAssistant,
+    connection: ActiveConnection,
+    msg: Dict[str, Any]
+) -> None:
+    """Stream audit log entries, newest first, as chunk events.
+
+    Large exports are sent as {"chunk": [...]} events followed by a final
+    {"end": true}, so neither side holds or encodes the whole log at once.
+    """
+    db: Database = hass.data[DOMAIN]["db"]
+    connection.send_result(msg['id'])
+    chunks = db.async_iter_audit_log(
+        user_id=msg.get('user_id'),
+        action=msg.get('action'),
+        target_type=msg.get('target_type'),
+        target_id=msg.get('target_id'),
+        limit=msg['limit'],
+        before_id=msg.get('cursor')
+    )
+    try:
+        # aclosing returns the pooled reader even if sending fails midway
+        async with aclosing(chunks):
+            async for chunk in chunks:
+                connection.send_message(event_message(msg['id'], {'chunk': chunk}))
+        connection.send_message(event_message(msg['id'], {'end': True}))
+    except Exception as err:
+        connection.send_message(event_message(msg['id'], {'end': True, 'error': str(err)}))
+
+async def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    """Set up WebSocket API."""
+    # One database shared by every command; opening it per message would
+    # redo the connection and schema checks on each request
+    if "db" not in hass.data[DOMAIN]:
+        db = hass.data[DOMAIN]["db"] = await Database.async_create(hass)
+
+        async def _async_close_db(_event: Event) -> None:
+            """Flush buffered audit entries and close the database on shutdown."""
+            await hass.async_add_executor_job(db.close)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close_db)
 
     # Register all commands
     for cmd in [
@@ -207,5 +348,8 @@ async def async_setup_websocket_api(hass: HomeAssistant) -> None:
         websocket_delete_role,
         websocket_get_user_permissions,
         websocket_grant_permission,
+        websocket_check_permissions,
+        websocket_get_audit_log,
+        websocket_stream_audit_log,
     ]:
-        async_register_command(hass, cmd) 
\ No newline at end of file
+        async_register_command(hass, cmd)
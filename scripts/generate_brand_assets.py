@@ -1,21 +1,24 @@
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 import os
 
+@lru_cache(maxsize=None)
+def load_font(font_size):
+    # Icons and logos share font sizes, so each TrueType file is parsed once
+    try:
+        return ImageFont.truetype("arial.ttf", font_size)
+    except:
+        return ImageFont.load_default()
+
 def create_placeholder_image(size, text, output_path, is_icon=True):
-    # Create a new image with a white background
-    image = Image.new('RGBA', size, (255, 255, 255, 0))
-    draw = ImageDraw.Draw(image)
-    
-    # Draw a light blue rectangle
+    # Start from the light blue fill instead of painting it over a blank image
     rect_color = (41, 128, 185, 200)  # Home Assistant-like blue
-    draw.rectangle([0, 0, size[0]-1, size[1]-1], fill=rect_color, outline=(0, 0, 0, 255))
+    image = Image.new('RGBA', size, rect_color)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([0, 0, size[0]-1, size[1]-1], outline=(0, 0, 0, 255))
     
     # Add text
-    font_size = min(size) // 8
-    try:
-        font = ImageFont.truetype("arial.ttf", font_size)
-    except:
-        font = ImageFont.load_default()
+    font = load_font(min(size) // 8)
     
     text_bbox = draw.textbbox((0, 0), text, font=font)
     text_width = text_bbox[2] - text_bbox[0]
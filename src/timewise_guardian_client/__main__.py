@@ -5,22 +5,25 @@ import asyncio
 import logging
 import socket
 import argparse
+import getpass
+from functools import lru_cache
 from typing import Optional
 from .auth import HomeAssistantAuth, AuthenticationError
 from .common.config import Config
 from .common.client import BaseClient
-from .windows.client import WindowsClient
-from .linux.client import LinuxClient
 
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=1)
 def get_default_computer_id() -> str:
     """Get default computer identifier."""
     return socket.gethostname()
 
+@lru_cache(maxsize=1)
 def get_system_user() -> str:
     """Get current system user."""
-    return os.getlogin()
+    # os.getlogin() raises without a controlling terminal (services, cron)
+    return getpass.getuser()
 
 async def main(args: Optional[argparse.Namespace] = None) -> None:
     """Main entry point."""
@@ -58,10 +61,13 @@ async def main(args: Optional[argparse.Namespace] = None) -> None:
         else:
             config = Config.load(args.config)
 
-        # Create and run client
+        # Create and run client; only import the backend for this platform,
+        # the other one's native dependencies may not even be installed
         if os.name == 'nt':
+            from .windows.client import WindowsClient
             client = WindowsClient(config)
         elif os.name == 'posix':
+            from .linux.client import LinuxClient
             client = LinuxClient(config)
         else:
             raise RuntimeError(f"Unsupported platform: {os.name}")
@@ -3,6 +3,7 @@ import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from datetime import datetime, timedelta
 from custom_components.twg.coordinator import TWGCoordinator
+from custom_components.twg.models import UserRuntime
 
 @pytest.fixture
 def mock_hass():
@@ -18,42 +19,48 @@ def mock_hass():
     return hass
 
 @pytest.fixture
-def coordinator(mock_hass):
+def mock_entry():
+    """Create mock config entry."""
+    entry = Mock()
+    entry.async_on_unload = Mock()
+    return entry
+
+@pytest.fixture
+def coordinator(mock_hass, mock_entry):
     """Create coordinator instance."""
-    return TWGCoordinator(mock_hass)
+    with patch("custom_components.twg.coordinator.async_at_started"):
+        return TWGCoordinator(mock_hass, mock_entry)
 
 async def test_coordinator_initialization(coordinator):
     """Test coordinator initialization."""
     assert coordinator.update_interval == timedelta(seconds=30)
-    assert coordinator._active_users == {}
+    assert coordinator._users == {}
     assert coordinator._available_categories == {}
-    assert coordinator._user_states == {}
-    assert coordinator._blocked_domains == {}
-    assert coordinator._time_limits == {}
-    assert coordinator._restrictions == {}
+
+async def test_listeners_released_on_unload(coordinator, mock_hass, mock_entry):
+    """Test that every event listener is registered for cleanup on unload."""
+    assert mock_hass.bus.async_listen.call_count == 3
+    assert mock_entry.async_on_unload.call_count == 4
 
 async def test_coordinator_update(coordinator):
     """Test coordinator update method."""
     # Add test data
-    coordinator._active_users = {
-        "test_user": {
-            "computer_id": "PC1",
-            "friendly_name": "Test User",
-            "system_user": "testuser"
-        }
+    info = {
+        "computer_id": "PC1",
+        "friendly_name": "Test User",
+        "system_user": "testuser"
     }
-    coordinator._user_states = {
-        "test_user": {
-            "state": "active",
-            "windows": ["Test Window"],
-            "processes": ["test.exe"]
-        }
+    state = {
+        "state": "active",
+        "windows": ["Test Window"],
+        "processes": ["test.exe"]
     }
+    coordinator._users["test_user"] = UserRuntime(info=info, state=state)
 
     data = await coordinator._async_update_data()
 
-    assert data["users"] == coordinator._active_users
-    assert data["states"] == coordinator._user_states
+    assert data["users"] == {"test_user": info}
+    assert data["states"] == {"test_user": state}
 
 async def test_handle_user_detected(coordinator):
     """Test handling of user detection event."""
@@ -69,18 +76,20 @@ async def test_handle_user_detected(coordinator):
 
     coordinator._handle_user_detected(event)
 
-    assert "test_user" in coordinator._active_users
-    assert coordinator._active_users["test_user"] == event.data["user_info"]
-    assert coordinator._user_states["test_user"]["state"] == "active"
+    assert "test_user" in coordinator._users
+    assert coordinator._users["test_user"].info == event.data["user_info"]
+    assert coordinator._users["test_user"].state["state"] == "active"
 
 async def test_handle_user_activity(coordinator):
     """Test handling of user activity event."""
     # First add a user
-    coordinator._active_users["test_user"] = {
-        "computer_id": "PC1",
-        "friendly_name": "Test User"
-    }
-    coordinator._user_states["test_user"] = {"state": "active"}
+    coordinator._users["test_user"] = UserRuntime(
+        info={
+            "computer_id": "PC1",
+            "friendly_name": "Test User"
+        },
+        state={"state": "active"}
+    )
 
     event = Mock()
     event.data = {
@@ -93,8 +102,47 @@ async def test_handle_user_activity(coordinator):
 
     coordinator._handle_user_activity(event)
 
-    assert coordinator._user_states["test_user"]["windows"] == ["New Window"]
-    assert coordinator._user_states["test_user"]["processes"] == ["new.exe"]
+    assert coordinator._users["test_user"].state["windows"] == ["New Window"]
+    assert coordinator._users["test_user"].state["processes"] == ["new.exe"]
+
+async def test_handle_user_activity_before_detection(coordinator):
+    """Test activity received before user detection is kept for the user."""
+    event = Mock()
+    event.data = {
+        "user_id": "test_user",
+        "activity": {"state": "idle", "windows": ["Early Window"]}
+    }
+    coordinator._handle_user_activity(event)
+    assert "test_user" not in coordinator._users
+
+    event.data = {
+        "user_id": "test_user",
+        "user_info": {"friendly_name": "Test User"}
+    }
+    coordinator._handle_user_detected(event)
+
+    assert coordinator._users["test_user"].state == {
+        "state": "idle",
+        "windows": ["Early Window"]
+    }
+
+async def test_handle_user_activity_unchanged(coordinator):
+    """Test that repeated identical activity does not notify listeners."""
+    coordinator._users["test_user"] = UserRuntime(
+        info={"friendly_name": "Test User"},
+        state={"state": "active", "windows": ["Same Window"]}
+    )
+    coordinator.async_set_updated_data = Mock()
+
+    event = Mock()
+    event.data = {
+        "user_id": "test_user",
+        "activity": {"windows": ["Same Window"]}
+    }
+
+    coordinator._handle_user_activity(event)
+
+    coordinator.async_set_updated_data.assert_not_called()
 
 async def test_handle_categories_updated(coordinator):
     """Test handling of categories update event."""
@@ -113,7 +161,7 @@ async def test_handle_categories_updated(coordinator):
 async def test_update_user_state(coordinator):
     """Test updating user state."""
     user_id = "test_user"
-    coordinator._user_states[user_id] = {"state": "active"}
+    coordinator._users[user_id] = UserRuntime(state={"state": "active"})
 
     new_state = {
         "windows": ["New Window"],
@@ -122,24 +170,34 @@ async def test_update_user_state(coordinator):
 
     await coordinator.async_update_user_state(user_id, new_state)
 
-    assert coordinator._user_states[user_id]["windows"] == ["New Window"]
-    assert coordinator._user_states[user_id]["processes"] == ["new.exe"]
-    assert coordinator._user_states[user_id]["state"] == "active"
+    assert coordinator._users[user_id].state["windows"] == ["New Window"]
+    assert coordinator._users[user_id].state["processes"] == ["new.exe"]
+    assert coordinator._users[user_id].state["state"] == "active"
 
 async def test_update_blocked_domains(coordinator):
     """Test updating blocked domains."""
     user_id = "test_user"
-    coordinator._blocked_domains[user_id] = set()
+    coordinator._users[user_id] = UserRuntime()
 
     domains = {"facebook.com", "twitter.com"}
     await coordinator.async_update_blocked_domains(user_id, domains)
 
-    assert coordinator._blocked_domains[user_id] == domains
+    assert coordinator._users[user_id].blocked == domains
+
+async def test_update_blocked_domains_unchanged(coordinator):
+    """Test that an identical blocked domain set does not notify listeners."""
+    user_id = "test_user"
+    coordinator._users[user_id] = UserRuntime(blocked={"facebook.com"})
+    coordinator.async_set_updated_data = Mock()
+
+    await coordinator.async_update_blocked_domains(user_id, {"facebook.com"})
+
+    coordinator.async_set_updated_data.assert_not_called()
 
 async def test_update_time_limits(coordinator):
     """Test updating time limits."""
     user_id = "test_user"
-    coordinator._time_limits[user_id] = {}
+    coordinator._users[user_id] = UserRuntime()
 
     limits = {
         "daily_limit": 7200,
@@ -150,12 +208,13 @@ async def test_update_time_limits(coordinator):
 
     await coordinator.async_update_time_limits(user_id, limits)
 
-    assert coordinator._time_limits[user_id] == limits
+    assert coordinator._users[user_id].limits == limits
+    assert coordinator.get_user_version(user_id) == 1
 
 async def test_update_restrictions(coordinator):
     """Test updating restrictions."""
     user_id = "test_user"
-    coordinator._restrictions[user_id] = {}
+    coordinator._users[user_id] = UserRuntime()
 
     restrictions = {
         "schedule": [
@@ -169,16 +228,18 @@ async def test_update_restrictions(coordinator):
 
     await coordinator.async_update_restrictions(user_id, restrictions)
 
-    assert coordinator._restrictions[user_id] == restrictions
+    assert coordinator._users[user_id].restrictions == restrictions
 
 async def test_get_user_config(coordinator):
     """Test getting user configuration."""
     user_id = "test_user"
-    coordinator._active_users[user_id] = {"friendly_name": "Test User"}
-    coordinator._user_states[user_id] = {"state": "active"}
-    coordinator._blocked_domains[user_id] = {"facebook.com"}
-    coordinator._time_limits[user_id] = {"daily_limit": 7200}
-    coordinator._restrictions[user_id] = {"schedule": []}
+    coordinator._users[user_id] = UserRuntime(
+        info={"friendly_name": "Test User"},
+        state={"state": "active"},
+        blocked={"facebook.com"},
+        limits={"daily_limit": 7200},
+        restrictions={"schedule": []}
+    )
 
     config = coordinator.get_user_config(user_id)
 
@@ -188,12 +249,25 @@ async def test_get_user_config(coordinator):
     assert config["time_limits"] == {"daily_limit": 7200}
     assert config["restrictions"] == {"schedule": []}
 
+async def test_get_user_config_cached(coordinator):
+    """Test that the user config view is reused until blocked domains change."""
+    user_id = "test_user"
+    coordinator._users[user_id] = UserRuntime(blocked={"facebook.com"})
+
+    config = coordinator.get_user_config(user_id)
+    assert coordinator.get_user_config(user_id) is config
+
+    await coordinator.async_update_blocked_domains(user_id, {"twitter.com"})
+
+    config = coordinator.get_user_config(user_id)
+    assert config["blocked_domains"] == ["twitter.com"]
+
 async def test_is_user_active(coordinator):
     """Test checking if user is active."""
     user_id = "test_user"
     assert not coordinator.is_user_active(user_id)
 
-    coordinator._active_users[user_id] = {"friendly_name": "Test User"}
+    coordinator._users[user_id] = UserRuntime(info={"friendly_name": "Test User"})
     assert coordinator.is_user_active(user_id)
 
 async def test_get_active_users(coordinator):
@@ -202,10 +276,18 @@ async def test_get_active_users(coordinator):
         "user1": {"friendly_name": "User 1"},
         "user2": {"friendly_name": "User 2"}
     }
-    coordinator._active_users = users
+    for user_id, info in users.items():
+        coordinator._users[user_id] = UserRuntime(info=info)
 
     assert coordinator.get_active_users() == users
 
+async def test_get_user_info(coordinator):
+    """Test getting a single user's info."""
+    info = {"friendly_name": "User 1"}
+    coordinator._users["user1"] = UserRuntime(info=info)
+
+    assert coordinator.get_user_info("user1") is info
+
 async def test_get_available_categories(coordinator):
     """Test getting available categories."""
     categories = {
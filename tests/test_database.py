@@ -0,0 +1,141 @@
+"""Tests for the TWG database."""
+import asyncio
+import threading
+from contextlib import aclosing, contextmanager
+import pytest
+from unittest.mock import Mock, patch
+from custom_components.twg.database import (
+    AUDIT_FLUSH_INTERVAL,
+    AUDIT_STREAM_CHUNK,
+    READER_POOL_SIZE,
+    Database,
+    DatabaseBusy,
+)
+
+@pytest.fixture
+def mock_hass(tmp_path):
+    """Create mock hass with the config dir in a temp path and a real executor."""
+    hass = Mock()
+    hass.config.path = lambda name: str(tmp_path / name)
+
+    def async_add_executor_job(func, *args):
+        return asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    hass.async_add_executor_job = async_add_executor_job
+    return hass
+
+@pytest.fixture
+def database(mock_hass):
+    """Create a database instance."""
+    db = Database(mock_hass)
+    yield db
+    db.close()
+
+async def test_check_permissions_after_grant_and_revoke(database):
+    """Test bulk checks see grants and revokes made with int user ids."""
+    checks = [("5", "manage_roles"), ("5", "view_audit_log")]
+    assert await database.async_check_permissions(checks) == [False, False]
+
+    await database.async_grant_permission(5, "manage_roles", "admin")
+    assert await database.async_check_permissions(checks) == [True, False]
+
+    await database.async_revoke_permission(5, "manage_roles", "admin")
+    assert await database.async_check_permissions(checks) == [False, False]
+
+def _revoke_during_next_read(database):
+    """Revoke manage_roles from user 5 right after the next lookup's query."""
+    read = database._read
+
+    @contextmanager
+    def racing_read():
+        with read() as cursor:
+            yield cursor
+        del database._read
+        database.revoke_permission("5", "manage_roles", "admin")
+
+    database._read = racing_read
+
+def test_check_permission_racing_revoke(database):
+    """Test a lookup that overlaps a revoke does not cache its stale result."""
+    database.grant_permission("5", "manage_roles", "admin")
+    _revoke_during_next_read(database)
+
+    assert database.check_permission("5", "manage_roles")
+    assert not database.check_permission("5", "manage_roles")
+
+def test_check_permissions_racing_revoke(database):
+    """Test a bulk lookup that overlaps a revoke does not cache stale results."""
+    database.grant_permission("5", "manage_roles", "admin")
+    _revoke_during_next_read(database)
+
+    assert database.check_permissions([("5", "manage_roles")]) == [True]
+    assert database.check_permissions([("5", "manage_roles")]) == [False]
+
+async def test_stream_cancelled_mid_chunk_returns_reader(database):
+    """Test cancelling a stream while a chunk is being read frees its reader."""
+    for i in range(AUDIT_STREAM_CHUNK + 1):
+        database.log_audit("admin", "test", "user", str(i))
+
+    started = threading.Event()
+    release = threading.Event()
+    iter_dicts = Database._iter_dicts
+
+    def slow_iter_dicts(cursor):
+        started.set()
+        release.wait(5)
+        yield from iter_dicts(cursor)
+
+    async def consume():
+        async with aclosing(database.async_iter_audit_log(limit=1000)) as chunks:
+            async for _chunk in chunks:
+                pass
+
+    database._iter_dicts = slow_iter_dicts
+    task = asyncio.create_task(consume())
+    await asyncio.to_thread(started.wait, 5)
+    task.cancel()
+    # Let the cancellation land while the chunk is still being read
+    await asyncio.sleep(0)
+    release.set()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert database._readers.qsize() == READER_POOL_SIZE
+
+async def test_reader_checkout_times_out(database):
+    """Test reads fail with a clear error when every reader is checked out."""
+    readers = [database._readers.get_nowait() for _ in range(READER_POOL_SIZE)]
+    try:
+        with patch("custom_components.twg.database.READER_TIMEOUT", 0.01):
+            with pytest.raises(DatabaseBusy):
+                database.check_permission("5", "manage_roles")
+    finally:
+        for reader in readers:
+            database._readers.put(reader)
+
+async def test_audit_entry_flushed_by_timer(database):
+    """Test a lone buffered audit entry is written once the flush timer fires."""
+    database.hass.loop = asyncio.get_running_loop()
+    with patch("custom_components.twg.database.async_call_later") as call_later:
+        await database.async_log_audit("admin", "test", "user", "1")
+        await asyncio.sleep(0)
+        assert len(database._audit_buf) == 1
+
+        _hass, delay, action = call_later.call_args[0]
+        assert delay == AUDIT_FLUSH_INTERVAL
+        await action(None)
+
+    assert not database._audit_buf
+    with database._read() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM audit_log WHERE action = 'test'")
+        assert cursor.fetchone()[0] == 1
+
+def test_timestamps_read_back_as_text(database):
+    """Test TIMESTAMP columns keep their stored text, even when malformed."""
+    database.grant_permission("5", "manage_roles", "admin")
+    with database._write() as cursor:
+        cursor.execute("UPDATE user_permissions SET expires_at = 'someday'")
+
+    permission = database.get_user_permissions("5")[0]
+    assert isinstance(permission["granted_at"], str)
+    assert permission["expires_at"] == "someday"
@@ -3,6 +3,8 @@ import pytest
 from unittest.mock import Mock, AsyncMock, patch
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from custom_components.twg.coordinator import TWGCoordinator
+from custom_components.twg.models import UserRuntime
 from custom_components.twg.sensor import (
     TWGUserSensor,
     TWGActivitySensor,
@@ -32,8 +34,12 @@ def mock_coordinator(mock_hass):
     }
     coordinator.async_request_refresh = AsyncMock()
     coordinator.get_active_users = Mock(return_value={})
+    coordinator.get_user_info = Mock(return_value={"friendly_name": "Test User"})
+    coordinator.last_update_success = True
+    coordinator.is_user_active = Mock(return_value=True)
     coordinator.async_get_active_users = AsyncMock(return_value={})
     coordinator.get_user_config = Mock(return_value={})
+    coordinator.get_user_version = Mock(return_value=0)
     coordinator.get_available_categories = Mock(return_value={})
     return coordinator
 
@@ -80,10 +86,12 @@ async def test_user_sensor(mock_coordinator, user_data):
         }
     }
     mock_coordinator.get_active_users.return_value = {user_id: user_data["info"]}
+    mock_coordinator.get_user_info.return_value = user_data["info"]
     mock_coordinator.async_get_active_users.return_value = {user_id: user_data["info"]}
     mock_coordinator.get_user_config.return_value = user_data["info"]
 
     sensor = TWGUserSensor(mock_coordinator, user_id)
+    await sensor.async_added_to_hass()
     assert sensor.unique_id == f"twg_{user_id}_status"
     assert sensor.name == f"TWG {user_data['info']['friendly_name']} Status"
     assert sensor.native_value == "active"
@@ -101,10 +109,12 @@ async def test_activity_sensor(mock_coordinator, user_data):
         }
     }
     mock_coordinator.get_active_users.return_value = {user_id: user_data["info"]}
+    mock_coordinator.get_user_info.return_value = user_data["info"]
     mock_coordinator.async_get_active_users.return_value = {user_id: user_data["info"]}
     mock_coordinator.get_user_config.return_value = user_data["info"]
 
     sensor = TWGActivitySensor(mock_coordinator, user_id)
+    await sensor.async_added_to_hass()
     assert sensor.unique_id == f"twg_{user_id}_activity"
     assert sensor.name == f"TWG {user_data['info']['friendly_name']} Activity"
     assert sensor.native_value == user_data["activity"]["state"]
@@ -122,10 +132,12 @@ async def test_time_limit_sensor(mock_coordinator, user_data):
         }
     }
     mock_coordinator.get_active_users.return_value = {user_id: user_data["info"]}
+    mock_coordinator.get_user_info.return_value = user_data["info"]
     mock_coordinator.async_get_active_users.return_value = {user_id: user_data["info"]}
     mock_coordinator.get_user_config.return_value = user_data["info"]
 
     sensor = TWGTimeLimitSensor(mock_coordinator, user_id)
+    await sensor.async_added_to_hass()
     assert sensor.unique_id == f"twg_{user_id}_time_limit"
     assert sensor.name == f"TWG {user_data['info']['friendly_name']} Time Limit"
     assert sensor.native_value == user_data["time_limits"]["time_remaining"]
@@ -143,11 +155,13 @@ async def test_blocked_domains_sensor(mock_coordinator, user_data):
         }
     }
     mock_coordinator.get_active_users.return_value = {user_id: user_data["info"]}
+    mock_coordinator.get_user_info.return_value = user_data["info"]
     mock_coordinator.async_get_active_users.return_value = {user_id: user_data["info"]}
     mock_coordinator.get_user_config.return_value = user_data["info"]
     mock_coordinator.get_available_categories.return_value = {"social": "Social Media"}
 
     sensor = TWGBlockedDomainsSensor(mock_coordinator, user_id)
+    await sensor.async_added_to_hass()
     assert sensor.unique_id == f"twg_{user_id}_blocked"
     assert sensor.name == f"TWG {user_data['info']['friendly_name']} Blocked"
     assert sensor.native_value == len(user_data["blocked_domains"])
@@ -167,8 +181,10 @@ async def test_sensor_unavailable(mock_coordinator, user_data):
     mock_coordinator.get_active_users.return_value = {}
     mock_coordinator.async_get_active_users.return_value = {}
     mock_coordinator.get_user_config.return_value = None
+    mock_coordinator.is_user_active.return_value = False
 
     sensor = TWGUserSensor(mock_coordinator, user_id)
+    await sensor.async_added_to_hass()
     assert not sensor.available
 
 async def test_dynamic_entity_creation(mock_hass, mock_coordinator, user_data):
@@ -183,6 +199,7 @@ async def test_dynamic_entity_creation(mock_hass, mock_coordinator, user_data):
         }
     }
     mock_coordinator.get_active_users.return_value = {user_id: user_data["info"]}
+    mock_coordinator.get_user_info.return_value = user_data["info"]
     mock_coordinator.async_get_active_users.return_value = {user_id: user_data["info"]}
     mock_coordinator.get_user_config.return_value = user_data["info"]
 
@@ -214,14 +231,71 @@ async def test_sensor_update_on_coordinator_update(mock_coordinator, user_data):
         }
     }
     mock_coordinator.get_active_users.return_value = {user_id: user_data["info"]}
+    mock_coordinator.get_user_info.return_value = user_data["info"]
     mock_coordinator.async_get_active_users.return_value = {user_id: user_data["info"]}
     mock_coordinator.get_user_config.return_value = user_data["info"]
 
     sensor = TWGUserSensor(mock_coordinator, user_id)
+    await sensor.async_added_to_hass()
     assert sensor.native_value == "active"
 
     # Update coordinator data
     mock_coordinator.data["states"][user_id]["state"] = "idle"
-    await mock_coordinator.async_request_refresh()
+    sensor.async_write_ha_state = Mock()
+    sensor._handle_coordinator_update()
+    sensor.async_write_ha_state.assert_called_once()
 
-    assert sensor.native_value == "idle" 
\ No newline at end of file
+    assert sensor.native_value == "idle"
+
+async def test_sensor_skips_unchanged_update(mock_coordinator, user_data):
+    """Test sensors do not rewrite state when coordinator data is unchanged."""
+    user_id = user_data["user_id"]
+    mock_coordinator.data = {
+        "users": {
+            user_id: user_data["info"]
+        },
+        "states": {
+            user_id: {"state": "active"}
+        }
+    }
+    mock_coordinator.get_user_info.return_value = user_data["info"]
+    mock_coordinator.get_user_config.return_value = user_data["info"]
+
+    sensor = TWGUserSensor(mock_coordinator, user_id)
+    await sensor.async_added_to_hass()
+    sensor.async_write_ha_state = Mock()
+
+    sensor._handle_coordinator_update()
+    sensor._handle_coordinator_update()
+    assert sensor.async_write_ha_state.call_count == 1
+
+    mock_coordinator.data["states"][user_id]["state"] = "idle"
+    sensor._handle_coordinator_update()
+    assert sensor.async_write_ha_state.call_count == 2
+
+async def test_user_sensor_writes_on_in_place_changes(mock_hass, user_data):
+    """Test the status sensor writes when the live config view changes in place."""
+    user_id = user_data["user_id"]
+    with patch("custom_components.twg.coordinator.async_at_started"):
+        coordinator = TWGCoordinator(mock_hass, Mock())
+    coordinator.async_set_updated_data = Mock()
+    coordinator._users[user_id] = UserRuntime(
+        info=user_data["info"], state={"state": "active"}
+    )
+
+    sensor = TWGUserSensor(coordinator, user_id)
+    await sensor.async_added_to_hass()
+    sensor.async_write_ha_state = Mock()
+    sensor._handle_coordinator_update()
+    assert sensor.async_write_ha_state.call_count == 1
+
+    await coordinator.async_update_time_limits(user_id, {"daily_limit": 3600})
+    sensor._handle_coordinator_update()
+    assert sensor.async_write_ha_state.call_count == 2
+
+    event = Mock()
+    event.data = {"user_id": user_id, "activity": {"active_window": "Editor"}}
+    coordinator._handle_user_activity(event)
+    sensor._handle_coordinator_update()
+    assert sensor.async_write_ha_state.call_count == 3
+    assert sensor.extra_state_attributes["state"]["active_window"] == "Editor"